@@ -27,12 +27,14 @@ INSTALLED_APPS = [
     'drf_spectacular',
     'auction',
     'user',
+    'notifications',
     'rest_framework',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'django.contrib.postgres',
     'cloudinary',
     'cloudinary_storage',
     'django.contrib.staticfiles',
@@ -43,7 +45,7 @@ INSTALLED_APPS = [
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'user.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
@@ -117,6 +119,10 @@ CLOUDINARY_STORAGE = {
 
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 
+# UserPhotos/profile_pic storage (see user/storage.py) and how many photos of one request upload at once
+PHOTO_STORAGE = os.getenv('PHOTO_STORAGE', 'cloudinary_storage.storage.MediaCloudinaryStorage')
+PHOTO_UPLOAD_WORKERS = int(os.getenv('PHOTO_UPLOAD_WORKERS', 5))
+
 MEDIA_URL = '/media/'
 
 WSGI_APPLICATION = 'DatingAuction.wsgi.application'
@@ -134,6 +140,23 @@ DATABASES = {
 }
 
 
+# local memory by default; point CACHE_BACKEND/CACHE_LOCATION at redis or memcached to share it between workers
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+REFERENCE_CACHE_TIMEOUT = 60 * 60 * 24
+# with the local-memory cache, how long each process serves (and 304s) reference lists saved in another
+REFERENCE_LOCAL_STATE_TIMEOUT = 60
+
+# lots/<pk>/events/ (see auction/events.py); the in-process broker needs a single ASGI process
+LOT_EVENTS_BROKER = os.getenv('LOT_EVENTS_BROKER', 'auction.events.InProcessBroker')
+LOT_EVENTS_HEARTBEAT_SECONDS = 15
+
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -194,5 +217,20 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=14),
 }
 
+# CachedJWTAuthentication caches users only in a cache shared by all workers (CACHE_BACKEND),
+# or in the local-memory one when the app runs as a single process
+AUTH_USER_CACHE_TIMEOUT = 60
+AUTH_USER_CACHE_ALLOW_LOCAL = os.getenv('AUTH_USER_CACHE_ALLOW_LOCAL', 'false').lower() == 'true'
+
 DISCORD_BOT_URL = os.getenv('DISCORD_BOT_URL', default='http://localhost:5005')
 DISCORD_BOT_TOKEN = os.getenv('DISCORD_BOT_TOKEN')
+DISCORD_HTTP_TIMEOUT_SECONDS = 5
+DISCORD_HTTP_POOL_LIMIT = int(os.getenv('DISCORD_HTTP_POOL_LIMIT', 20))
+DISCORD_HTTP_KEEPALIVE_SECONDS = 30
+DISCORD_NOTIFY_BATCH_SIZE = 50
+
+# notifications are delivered by `python manage.py run_notification_worker`
+NOTIFICATION_OUTBOX_BATCH_SIZE = 50
+NOTIFICATION_OUTBOX_MAX_ATTEMPTS = 8
+NOTIFICATION_OUTBOX_BACKOFF_SECONDS = 5
+NOTIFICATION_OUTBOX_BACKOFF_MAX_SECONDS = 3600
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import threading
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from auction.serializers import CommentThreadSerializer
+
+# Live bid/comment events per lot, streamed by LotEvents (lots/<pk>/events/) as server-sent events.
+# Views publish after their transaction commits; the broker fans each event out to the lot's
+# subscribers. LOT_EVENTS_BROKER picks the broker class: the in-process default only reaches
+# clients connected to the same process, so multi-process deployments plug in a shared one.
+
+
+def format_event(event_type, data):
+    """One SSE frame, encoded once however many clients receive it."""
+    return f"event: {event_type}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+class LotEventBroker(ABC):
+    @abstractmethod
+    def subscribe(self, lot_id):
+        """
+        Called on the event loop of the streaming response; returns a subscription with an
+        awaitable get() for the lot's next frame and a close() to unsubscribe.
+        """
+
+    @abstractmethod
+    def publish(self, lot_id, frame):
+        """Delivers a frame to the lot's current subscribers; callable from any thread."""
+
+
+class InProcessSubscription:
+    def __init__(self, broker, lot_id, queue_size):
+        self.broker = broker
+        self.lot_id = lot_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def offer(self, frame):
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            pass
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker(LotEventBroker):
+    # a subscriber that falls this far behind misses events rather than growing memory
+    queue_size = 100
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, lot_id):
+        subscription = InProcessSubscription(self, lot_id, self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(lot_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.lot_id, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._subscribers.pop(subscription.lot_id, None)
+
+    def publish(self, lot_id, frame):
+        with self._lock:
+            subscribers = list(self._subscribers.get(lot_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, frame)
+            except RuntimeError:
+                # the subscriber's loop closed before it unsubscribed
+                pass
+
+    def subscriber_count(self, lot_id):
+        with self._lock:
+            return len(self._subscribers.get(lot_id, ()))
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(getattr(settings, 'LOT_EVENTS_BROKER', 'auction.events.InProcessBroker'))()
+    return _broker
+
+
+def publish_lot_event(lot_id, event_type, data):
+    # subscribers only ever see committed bids and comments
+    frame = format_event(event_type, data)
+    transaction.on_commit(lambda: get_broker().publish(lot_id, frame))
+
+
+def publish_bid(bid):
+    publish_lot_event(bid.lot_id, 'bid', {
+        'id': bid.id,
+        'amount': bid.amount,
+        'created_at': bid.created_at,
+    })
+
+
+def publish_comment(comment):
+    publish_lot_event(comment.lot_id, 'comment', CommentThreadSerializer(comment).data)
@@ -0,0 +1,44 @@
+from auction.models import Lot
+from auction.search import search_lots, order_by_rank
+
+# every sort ends with id so the order is total and matches the (key, id) indexes on Lot
+FEED_SORTS = {
+    'price_asc': ('last_bet', 'id'),
+    'price_desc': ('-last_bet', '-id'),
+    'created_at_asc': ('created_at', 'id'),
+    'created_at_desc': ('-created_at', '-id'),
+}
+DEFAULT_FEED_SORT = 'created_at_desc'
+
+# owner attributes denormalized onto Lot, so filtering needs no join
+FEED_FILTERS = {
+    'faculty': 'faculty_id',
+    'gender': 'gender_id',
+    'year': 'year_id',
+    'role': 'role_id',
+}
+
+
+def filter_feed(params, lots=None):
+    """The HomePage queryset for the given query params: search, filters and sort."""
+    lots = Lot.objects.for_feed() if lots is None else lots
+
+    search_query = params.get('search')
+    ranked = False
+    if search_query:
+        lots, ranked = search_lots(lots, search_query)
+
+    for param, lookup in FEED_FILTERS.items():
+        value = params.get(param)
+        if value:
+            lots = lots.filter(**{lookup: value})
+
+    if params.get('has_photo') == 'true':
+        lots = lots.filter(photo_count__gt=0)
+
+    sort_param = params.get('sort')
+    if sort_param in FEED_SORTS:
+        return lots.order_by(*FEED_SORTS[sort_param])
+    if ranked:
+        return order_by_rank(lots)
+    return lots.order_by(*FEED_SORTS[DEFAULT_FEED_SORT])
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from auction.models import Comment
+
+
+class Command(BaseCommand):
+    help = "Fills the author name/avatar snapshot of comments written before comments carried one."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        comments = Comment.objects.filter(author_name='').select_related('user').order_by('pk')
+        fields = ['author_name', 'author_avatar_url']
+
+        batch = []
+        updated = 0
+        for comment in comments.iterator(chunk_size=options['batch_size']):
+            for field, value in Comment.author_values(comment.user).items():
+                setattr(comment, field, value)
+            batch.append(comment)
+            if len(batch) >= options['batch_size']:
+                updated += Comment.objects.bulk_update(batch, fields)
+                batch = []
+        if batch:
+            updated += Comment.objects.bulk_update(batch, fields)
+
+        self.stdout.write(f"{updated} comments updated")
@@ -0,0 +1,79 @@
+import re
+from itertools import product
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from auction.feed import FEED_FILTERS, FEED_SORTS, filter_feed
+from auction.pagination import LotPagination
+
+# index names mentioned in a plan; only the ones belonging to auction_lot are reported
+INDEX_NAME = {
+    'postgresql': re.compile(r'(?:Scan(?: Backward)? using|Bitmap Index Scan on) (\S+)'),
+    'sqlite': re.compile(r'INDEX (\S+)'),
+}
+FULL_SCAN = {
+    'postgresql': re.compile(r'Seq Scan on auction_lot\b'),
+    'sqlite': re.compile(r'SCAN auction_lot(?! USING)'),
+}
+
+
+class Command(BaseCommand):
+    help = "Runs EXPLAIN on the HomePage query for every filter/sort combination and reports index usage."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--disable-seqscan', action='store_true',
+            help="PostgreSQL: SET enable_seqscan = off, to check an index is usable even on small tables.",
+        )
+        parser.add_argument(
+            '--fail-on-full-scan', action='store_true',
+            help="Exit with an error if any combination scans auction_lot without an index.",
+        )
+        parser.add_argument('--verbose-plans', action='store_true', help="Print the full plans.")
+
+    def combinations(self):
+        filter_values = {'faculty': 1, 'gender': 1, 'year': 1, 'role': 1, 'has_photo': 'true'}
+        for sort, filter_name in product(FEED_SORTS, [None, *FEED_FILTERS, 'has_photo']):
+            params = {'sort': sort}
+            if filter_name:
+                params[filter_name] = filter_values[filter_name]
+            yield params
+
+    def explain(self, params, disable_seqscan):
+        page = filter_feed(params)[:LotPagination.page_size]
+        with transaction.atomic():
+            if disable_seqscan and connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            return page.explain()
+
+    def lot_indexes(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, 'auction_lot')
+        return {name for name, info in constraints.items() if info['index'] or info['primary_key']}
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in INDEX_NAME:
+            raise CommandError(f"Don't know how to read {vendor} plans.")
+
+        lot_indexes = self.lot_indexes()
+
+        full_scans = []
+        for params in self.combinations():
+            plan = self.explain(params, options['disable_seqscan'])
+            label = ' '.join(f'{key}={value}' for key, value in params.items())
+
+            index_names = sorted(set(INDEX_NAME[vendor].findall(plan)) & lot_indexes)
+            if FULL_SCAN[vendor].search(plan):
+                full_scans.append(label)
+                self.stdout.write(self.style.WARNING(f"FULL SCAN  {label}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"index      {label}  ({', '.join(index_names) or 'primary key'})"))
+
+            if options['verbose_plans']:
+                self.stdout.write(plan + '\n')
+
+        if full_scans and options['fail_on_full_scan']:
+            raise CommandError(f"{len(full_scans)} feed queries scan auction_lot without an index.")
@@ -0,0 +1,57 @@
+from django.db import migrations, models
+
+
+TRIGRAM_INDEX = 'lot_search_trgm_idx'
+FULL_TEXT_INDEX = 'lot_search_fts_idx'
+
+
+def backfill_search_document(apps, schema_editor):
+    Lot = apps.get_model('auction', 'Lot')
+    lots = list(Lot.objects.select_related('user'))
+    for lot in lots:
+        parts = [
+            lot.display_first_name, lot.display_last_name,
+            lot.user.first_name, lot.user.last_name,
+            lot.description,
+        ]
+        lot.search_document = ' '.join(part for part in parts if part)
+    Lot.objects.bulk_update(lots, ['search_document'], batch_size=1000)
+
+
+def create_search_indexes(apps, schema_editor):
+    # PostgreSQL only; other backends use the icontains fallback in auction/search.py
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} ON auction_lot USING gin (search_document gin_trgm_ops)'
+    )
+    # same expression as SearchVector('search_document', config='simple') compiles to
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {FULL_TEXT_INDEX} ON auction_lot "
+        f"USING gin (to_tsvector('simple'::regconfig, COALESCE(search_document, '')))"
+    )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {TRIGRAM_INDEX}')
+    schema_editor.execute(f'DROP INDEX IF EXISTS {FULL_TEXT_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0003_comment_lot_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lot',
+            name='search_document',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(backfill_search_document, migrations.RunPython.noop),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
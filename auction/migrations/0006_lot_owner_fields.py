@@ -0,0 +1,98 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_owner_fields(apps, schema_editor):
+    Lot = apps.get_model('auction', 'Lot')
+    lots = list(Lot.objects.select_related('user__faculty', 'user__gender', 'user__year', 'user__role'))
+    for lot in lots:
+        user = lot.user
+        lot.owner_first_name = user.first_name
+        lot.owner_last_name = user.last_name
+        lot.faculty_id = user.faculty_id
+        lot.gender_id = user.gender_id
+        lot.year_id = user.year_id
+        lot.role_id = user.role_id
+        lot.faculty_name = user.faculty.name if user.faculty_id else ''
+        lot.gender_name = user.gender.gender if user.gender_id else ''
+        lot.year_name = user.year.year if user.year_id else ''
+        lot.role_name = user.role.name if user.role_id else ''
+    Lot.objects.bulk_update(lots, [
+        'owner_first_name', 'owner_last_name',
+        'faculty', 'gender', 'year', 'role',
+        'faculty_name', 'gender_name', 'year_name', 'role_name',
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0005_feed_sort_indexes'),
+        ('user', '0003_fix_username_null'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lot',
+            name='faculty',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='auction.faculty'),
+        ),
+        migrations.AddField(
+            model_name='lot',
+            name='faculty_name',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='lot',
+            name='gender',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='user.gender'),
+        ),
+        migrations.AddField(
+            model_name='lot',
+            name='gender_name',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='lot',
+            name='owner_first_name',
+            field=models.CharField(blank=True, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='lot',
+            name='owner_last_name',
+            field=models.CharField(blank=True, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='lot',
+            name='role',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='auction.role'),
+        ),
+        migrations.AddField(
+            model_name='lot',
+            name='role_name',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='lot',
+            name='year',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='user.year'),
+        ),
+        migrations.AddField(
+            model_name='lot',
+            name='year_name',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='lot',
+            index=models.Index(fields=['faculty', 'gender', 'year'], name='lot_owner_filters_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lot',
+            index=models.Index(fields=['gender', 'year'], name='lot_gender_year_idx'),
+        ),
+        migrations.RunPython(backfill_owner_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:16
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_photo_count(apps, schema_editor):
+    Lot = apps.get_model('auction', 'Lot')
+    UserPhotos = apps.get_model('user', 'UserPhotos')
+    photo_count = UserPhotos.objects.filter(user=OuterRef('user_id')).order_by().values('user').annotate(
+        count=Count('id')
+    ).values('count')
+    Lot.objects.update(photo_count=Coalesce(Subquery(photo_count), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0006_lot_owner_fields'),
+        ('user', '0003_fix_username_null'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lot',
+            name='photo_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='lot',
+            index=models.Index(fields=['photo_count'], name='lot_photo_count_idx'),
+        ),
+        migrations.RunPython(backfill_photo_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0007_lot_photo_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='author_avatar_url',
+            field=models.URLField(blank=True, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='author_name',
+            field=models.CharField(blank=True, max_length=301),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:32
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_bid_amount(apps, schema_editor):
+    Comment = apps.get_model('auction', 'Comment')
+    Bid = apps.get_model('auction', 'Bid')
+    Comment.objects.filter(bid__isnull=False).update(
+        bid_amount=Subquery(Bid.objects.filter(pk=OuterRef('bid_id')).values('amount')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0008_comment_author_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='bid_amount',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_bid_amount, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:39
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_bid_stats(apps, schema_editor):
+    Lot = apps.get_model('auction', 'Lot')
+    Bid = apps.get_model('auction', 'Bid')
+    lot_bids = Bid.objects.filter(lot=OuterRef('pk')).order_by().values('lot')
+    Lot.objects.update(
+        bid_count=Coalesce(Subquery(lot_bids.annotate(count=Count('id')).values('count')), 0),
+        bidder_count=Coalesce(Subquery(lot_bids.annotate(count=Count('user', distinct=True)).values('count')), 0),
+        last_bid_at=Subquery(lot_bids.annotate(latest=Max('created_at')).values('latest')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0009_comment_bid_amount'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lot',
+            name='bid_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='lot',
+            name='bidder_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='lot',
+            name='last_bid_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['lot', '-amount'], name='bid_lot_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['lot', '-created_at'], name='bid_lot_created_idx'),
+        ),
+        migrations.RunPython(backfill_bid_stats, migrations.RunPython.noop),
+    ]
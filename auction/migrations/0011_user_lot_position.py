@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def backfill_positions(apps, schema_editor):
+    Bid = apps.get_model('auction', 'Bid')
+    UserLotPosition = apps.get_model('auction', 'UserLotPosition')
+    latest_bids = Bid.objects.values('user', 'lot').annotate(latest_id=Max('id')).values('latest_id')
+    UserLotPosition.objects.bulk_create([
+        UserLotPosition(
+            user_id=bid.user_id, lot_id=bid.lot_id, bid_id=bid.id,
+            amount=bid.amount, bid_at=bid.created_at, is_overbid=bid.is_overbid,
+        )
+        for bid in Bid.objects.filter(id__in=latest_bids).iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0010_lot_bid_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserLotPosition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.IntegerField()),
+                ('bid_at', models.DateTimeField()),
+                ('is_overbid', models.BooleanField(default=False)),
+                ('bid', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='auction.bid')),
+                ('lot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='auction.lot')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lot_positions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-bid_at', '-id'], name='position_user_bid_at_idx'), models.Index(fields=['user', 'is_overbid', '-bid_at', '-id'], name='position_user_status_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'lot'), name='position_user_lot_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_positions, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Count, F, OuterRef, Prefetch, Subquery, Value
+from django.db.models.functions import Coalesce, NullIf
 
 from user.models import CustomUser
 
@@ -25,6 +27,43 @@ class Major(models.Model):
         return self.name
 
 
+class LotQuerySet(models.QuerySet):
+    def with_relations(self):
+        # everything LotSerializer touches, loaded in a fixed number of queries
+        from user.models import UserPhotos
+
+        return self.select_related(
+            'user__faculty', 'user__major', 'user__year', 'user__gender', 'user__role'
+        ).prefetch_related(
+            Prefetch('user__user_photos', queryset=UserPhotos.objects.order_by('created_at', 'id')),
+            'comment_set',
+        )
+
+    def for_feed(self):
+        # what LotFeedSerializer needs: no comment threads, only their count (the latest bid is on the lot).
+        # Owner attributes are denormalized onto Lot, so this reads auction_lot without joins.
+        from user.models import UserPhotos
+
+        comment_count = Comment.objects.filter(lot=OuterRef('pk')).order_by().values('lot').annotate(
+            count=Count('id')
+        ).values('count')
+        # the card shows the thumbnail; photos uploaded before thumbnails existed fall back to the original,
+        # and rows saved before URLs were stored fall back to the file name
+        main_photo = UserPhotos.objects.filter(user=OuterRef('user_id')).order_by('created_at', 'id')
+        main_photo_name = main_photo.values(
+            name=Coalesce(NullIf('thumbnail', Value('')), 'photo', output_field=models.CharField())
+        )
+        main_photo_url = main_photo.values(
+            url=Coalesce(NullIf('thumbnail_url', Value('')), NullIf('photo_url', Value('')))
+        )
+
+        return self.annotate(
+            main_photo_url=Subquery(main_photo_url[:1]),
+            main_photo_name=Subquery(main_photo_name[:1]),
+            comment_count=Coalesce(Subquery(comment_count), 0),
+        )
+
+
 class Lot(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -32,14 +71,114 @@ class Lot(models.Model):
     last_bet = models.IntegerField(default=0)
     display_first_name = models.CharField(max_length=150, blank=True)
     display_last_name = models.CharField(max_length=150, blank=True)
+    # display names, real names and description in one column, indexed for search (see auction/search.py)
+    search_document = models.TextField(blank=True, default='')
+
+    # copies of the owner's attributes so the feed filters and renders lots without joining users;
+    # refreshed by Lot.save() and by the CustomUser/reference-model signals in auction/signals.py
+    owner_first_name = models.CharField(max_length=150, blank=True)
+    owner_last_name = models.CharField(max_length=150, blank=True)
+    faculty = models.ForeignKey(Faculty, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    gender = models.ForeignKey('user.Gender', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    year = models.ForeignKey('user.Year', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    role = models.ForeignKey(Role, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    faculty_name = models.CharField(max_length=100, blank=True)
+    gender_name = models.CharField(max_length=100, blank=True)
+    year_name = models.CharField(max_length=100, blank=True)
+    role_name = models.CharField(max_length=100, blank=True)
+
+    # number of the owner's UserPhotos, kept by UploadLotPhoto; backs the has_photo feed filter
+    # and the MAX_PHOTOS cap (one lot per user, so this is the user's photo counter)
+    photo_count = models.PositiveSmallIntegerField(default=0)
+    MAX_PHOTOS = 5
+
+    # kept with F() updates; saving an existing lot never writes them back from a possibly stale instance
+    COUNTER_FIELDS = ['photo_count', 'bid_count', 'bidder_count', 'last_bid_at']
+
+    # bid statistics, kept by Bid.save(); the highest bid is last_bet
+    bid_count = models.PositiveIntegerField(default=0)
+    bidder_count = models.PositiveIntegerField(default=0)
+    last_bid_at = models.DateTimeField(null=True, blank=True)
+
+    objects = LotQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # HomePage sorts; id is the tie-breaker (see auction/feed.py)
+            models.Index(fields=['last_bet', 'id'], name='lot_last_bet_id_idx'),
+            models.Index(fields=['created_at', 'id'], name='lot_created_at_id_idx'),
+            # HomePage filters on the denormalized owner attributes (single-column FK indexes already exist)
+            models.Index(fields=['faculty', 'gender', 'year'], name='lot_owner_filters_idx'),
+            models.Index(fields=['gender', 'year'], name='lot_gender_year_idx'),
+            models.Index(fields=['photo_count'], name='lot_photo_count_idx'),
+        ]
+
+    OWNER_FIELDS = [
+        'owner_first_name', 'owner_last_name',
+        'faculty', 'gender', 'year', 'role',
+        'faculty_name', 'gender_name', 'year_name', 'role_name',
+    ]
+
+    @staticmethod
+    def owner_values(user):
+        return {
+            'owner_first_name': user.first_name,
+            'owner_last_name': user.last_name,
+            'faculty_id': user.faculty_id,
+            'gender_id': user.gender_id,
+            'year_id': user.year_id,
+            'role_id': user.role_id,
+            'faculty_name': user.faculty.name if user.faculty_id else '',
+            'gender_name': user.gender.gender if user.gender_id else '',
+            'year_name': user.year.year if user.year_id else '',
+            'role_name': user.role.name if user.role_id else '',
+        }
+
+    def build_search_document(self):
+        parts = [
+            self.display_first_name, self.display_last_name,
+            self.owner_first_name, self.owner_last_name,
+            self.description,
+        ]
+        return ' '.join(part for part in parts if part)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        lot = super().from_db(db, field_names, values)
+        lot._saved_user_id = lot.__dict__.get('user_id')
+        return lot
+
+    def save(self, *args, **kwargs):
+        from user.models import UserPhotos
+
+        if self._state.adding:
+            self.photo_count = UserPhotos.objects.filter(user_id=self.user_id).count()
+        # the owner copies are kept by the signals in auction/signals.py; only a new owner reloads them
+        owner_changed = self._state.adding or self.user_id != getattr(self, '_saved_user_id', None)
+        if owner_changed:
+            for field, value in self.owner_values(self.user).items():
+                setattr(self, field, value)
+        self.search_document = self.build_search_document()
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None and not self._state.adding:
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        if update_fields is not None:
+            owner_fields = self.OWNER_FIELDS if owner_changed else []
+            kwargs['update_fields'] = {*update_fields, *owner_fields, 'search_document'}
+        super().save(*args, **kwargs)
+        self._saved_user_id = self.user_id
 
     @property
     def first_name(self):
-        return self.display_first_name or self.user.first_name
+        return self.display_first_name or self.owner_first_name
 
     @property
     def last_name(self):
-        return self.display_last_name or self.user.last_name
+        return self.display_last_name or self.owner_last_name
 
 
 class Bid(models.Model):
@@ -51,6 +190,44 @@ class Bid(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # the lot's highest bid (place_bid) and its bid history (LotBids)
+            models.Index(fields=['lot', '-amount'], name='bid_lot_amount_idx'),
+            models.Index(fields=['lot', '-created_at'], name='bid_lot_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if adding:
+            new_bidder = not Bid.objects.filter(lot_id=self.lot_id, user_id=self.user_id).exists()
+        super().save(*args, **kwargs)
+
+        if adding:
+            Lot.objects.filter(pk=self.lot_id).update(
+                bid_count=F('bid_count') + 1,
+                bidder_count=F('bidder_count') + int(new_bidder),
+                last_bid_at=self.created_at,
+            )
+
+
+class UserLotPosition(models.Model):
+    """A user's latest bid on a lot, one row per (user, lot); kept by place_bid and listed by MyBids."""
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='lot_positions')
+    lot = models.ForeignKey(Lot, on_delete=models.CASCADE)
+    bid = models.ForeignKey(Bid, on_delete=models.CASCADE, related_name='+')
+    amount = models.IntegerField()
+    bid_at = models.DateTimeField()
+    is_overbid = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'lot'], name='position_user_lot_uniq'),
+        ]
+        indexes = [
+            # MyBids pages, with and without the status filter
+            models.Index(fields=['user', '-bid_at', '-id'], name='position_user_bid_at_idx'),
+            models.Index(fields=['user', 'is_overbid', '-bid_at', '-id'], name='position_user_status_idx'),
+        ]
 
 
 class Comment(models.Model):
@@ -61,8 +238,47 @@ class Comment(models.Model):
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True)
     lot = models.ForeignKey(Lot, on_delete=models.CASCADE)
 
+    # the author as they were when the comment was written, so threads render without joining users
+    author_name = models.CharField(max_length=301, blank=True)
+    author_avatar_url = models.URLField(max_length=500, blank=True)
+    # amount of the attached bid, so threads don't load bids to print it
+    bid_amount = models.IntegerField(null=True, blank=True)
+
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['lot', 'created_at'], name='comment_lot_created_idx'),
+        ]
+
+    @staticmethod
+    def author_values(user):
+        from user.storage import file_url
+
+        # the avatar thumbnail when there is one; pictures uploaded before thumbnails existed have none
+        if user.profile_pic_thumbnail:
+            avatar_url = file_url(user.profile_pic_thumbnail_url, user.profile_pic_thumbnail)
+        else:
+            avatar_url = file_url(user.profile_pic_url, user.profile_pic)
+        return {
+            'author_name': f"{user.first_name} {user.last_name}",
+            'author_avatar_url': avatar_url or '',
+        }
+
+    @classmethod
+    def update_author_avatar(cls, user):
+        # unlike the name, the avatar snapshot points at a file, which is deleted when the avatar changes
+        cls.objects.filter(user=user).update(author_avatar_url=cls.author_values(user)['author_avatar_url'])
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            for field, value in self.author_values(self.user).items():
+                setattr(self, field, value)
+        self.bid_amount = self.bid.amount if self.bid_id else None
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'bid' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'bid_amount'}
+        super().save(*args, **kwargs)
 
 
 class Themes(models.Model):
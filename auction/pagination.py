@@ -0,0 +1,135 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, OrderBy, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class LotPagination(PageNumberPagination):
+    page_size = 12
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a unique ordering such as ("created_at", "id").
+
+    The cursor stores the ordering values of the last row of the page, so the next
+    page is a plain range condition on an index instead of an OFFSET, and no COUNT is run.
+    """
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    ordering = ("created_at", "id")
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(queryset)
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        if cursor is not None:
+            try:
+                queryset = queryset.filter(self.after(cursor))
+            except (TypeError, ValueError, ValidationError):
+                # a cursor issued for another ordering
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def get_ordering(self, queryset):
+        return self.ordering
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def after(self, cursor):
+        # (a, b) > (x, y)  ==  a > x OR (a = x AND b > y), honouring each field's direction
+        condition = Q()
+        equal_prefix = {}
+        for field, value in zip(self.ordering, cursor):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= Q(**equal_prefix, **{f"{name}__{lookup}": value})
+            equal_prefix[name] = value
+
+        # redundant bound on the leading key so the planner can range-scan its index
+        first = self.ordering[0]
+        bound = "lte" if first.startswith("-") else "gte"
+        return Q(**{f"{first.lstrip('-')}__{bound}": cursor[0]}) & condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")).decode("utf-8"))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def encode_cursor(self, row):
+        values = [getattr(row, field.lstrip("-")) for field in self.ordering]
+        # full isoformat: DjangoJSONEncoder truncates microseconds, which would make the cursor skip rows
+        payload = json.dumps(values, default=lambda value: value.isoformat())
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data,
+        })
+
+
+class CommentThreadPagination(KeysetPagination):
+    page_size = 20
+    ordering = ("created_at", "id")
+
+
+class BidHistoryPagination(KeysetPagination):
+    page_size = 20
+    ordering = ("-created_at", "-id")
+
+
+class MyBidsPagination(KeysetPagination):
+    page_size = 20
+    ordering = ("-bid_at", "-id")
+
+
+class FeedCursorPagination(KeysetPagination):
+    """Opt-in HomePage pagination (?pagination=cursor) keyed on the feed's own sort, see auction/feed.py."""
+    page_size = 12
+
+    def get_ordering(self, queryset):
+        # ranked search orders by F('search_rank').desc(); the cursor keys on the annotation by name
+        ordering = []
+        for field in queryset.query.order_by:
+            if isinstance(field, OrderBy) and isinstance(field.expression, F):
+                field = f"{'-' if field.descending else ''}{field.expression.name}"
+            ordering.append(field)
+        return tuple(ordering)
@@ -0,0 +1,68 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Per-user limits on writes, counted in the shared cache: a check is a few cache round-trips
+# and never a query. Each limit is a sliding window approximated from two fixed windows: the
+# previous window's count is weighted by how much of it the sliding window still covers.
+# RATE_LIMITS overrides the (limit, seconds) of a scope.
+DEFAULT_RATE_LIMITS = {
+    'bid': (20, 60),
+    'complaint': (5, 60 * 60),
+    'photo_upload': (20, 60 * 60),
+}
+
+
+class RateLimit:
+    def __init__(self, scope, limit, window):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+        self.counted_key = None
+
+    def cache_key(self, ident, window_index):
+        return f'ratelimit:{self.scope}:{ident}:{window_index}'
+
+    def hit(self, ident, now=None):
+        """Counts an action by ident; returns False, without counting it, once the limit is reached."""
+        now = time.time() if now is None else now
+        window_index = int(now // self.window)
+        key = self.cache_key(ident, window_index)
+
+        # incr() is atomic on shared backends, so concurrent requests can't both take the last slot
+        cache.add(key, 0, timeout=self.window * 2)
+        try:
+            count = cache.incr(key)
+        except ValueError:
+            # expired between add() and incr()
+            cache.set(key, 1, timeout=self.window * 2)
+            count = 1
+
+        previous = cache.get(self.cache_key(ident, window_index - 1), 0)
+        covered = 1 - (now % self.window) / self.window
+        if previous * covered + count > self.limit:
+            self._decr(key)
+            return False
+        self.counted_key = key
+        return True
+
+    def undo(self):
+        """Takes back the last counted hit, for an action that failed validation after it was counted."""
+        if self.counted_key:
+            self._decr(self.counted_key)
+            self.counted_key = None
+
+    @staticmethod
+    def _decr(key):
+        try:
+            cache.decr(key)
+        except ValueError:
+            # expired in the meantime, so there is nothing to take back
+            pass
+
+
+def get_rate_limit(scope, default=None):
+    limits = {**DEFAULT_RATE_LIMITS, **getattr(settings, 'RATE_LIMITS', {})}
+    limit, window = limits.get(scope, default)
+    return RateLimit(scope, limit, window)
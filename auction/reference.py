@@ -0,0 +1,98 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from auction.models import Faculty, Major, Role
+from auction.serializers import FacultySerializer, MajorSerializer, RoleSerializer
+from user.models import Year, Gender
+from user.serializers import YearSerializer, GenderSerializer
+
+# Lookup tables rarely change, so they are cached under a version stored in the shared cache.
+# Every save/delete of one of these models (see auction/signals.py) starts a new version;
+# each process keeps its own copy per version and only asks the shared cache for the version.
+# The local-memory cache isn't shared, so there the version also expires after
+# REFERENCE_LOCAL_STATE_TIMEOUT: other processes pick up a change within that time.
+REFERENCE_SOURCES = {
+    'faculties': (Faculty, FacultySerializer),
+    'majors': (Major, MajorSerializer),
+    'roles': (Role, RoleSerializer),
+    'years': (Year, YearSerializer),
+    'genders': (Gender, GenderSerializer),
+}
+REFERENCE_MODELS = [model for model, _ in REFERENCE_SOURCES.values()]
+
+STATE_CACHE_KEY = 'reference:state'
+
+_local_cache = {}
+
+
+def _new_state():
+    return {'version': uuid.uuid4().hex, 'updated_at': timezone.now()}
+
+
+def _state_timeout():
+    if isinstance(caches['default'], LocMemCache):
+        return getattr(settings, 'REFERENCE_LOCAL_STATE_TIMEOUT', 60)
+    return None
+
+
+def get_reference_state():
+    state = cache.get(STATE_CACHE_KEY)
+    if state is None:
+        cache.add(STATE_CACHE_KEY, _new_state(), timeout=_state_timeout())
+        state = cache.get(STATE_CACHE_KEY) or _new_state()
+    return state
+
+
+def _start_new_version():
+    cache.set(STATE_CACHE_KEY, _new_state(), timeout=_state_timeout())
+    _local_cache.clear()
+
+
+def invalidate_reference_data():
+    _start_new_version()
+    # again after commit: a request running meanwhile may have cached the old rows under the new version
+    transaction.on_commit(_start_new_version)
+
+
+def get_reference_data(name, state=None):
+    state = state or get_reference_state()
+    version = state['version']
+
+    data = _local_cache.get((name, version))
+    if data is not None:
+        return data
+
+    shared_key = f'reference:{name}:{version}'
+    data = cache.get(shared_key)
+    if data is None:
+        model, serializer_class = REFERENCE_SOURCES[name]
+        data = [dict(item) for item in serializer_class(model.objects.order_by('id'), many=True).data]
+        cache.set(shared_key, data, timeout=getattr(settings, 'REFERENCE_CACHE_TIMEOUT', 60 * 60 * 24))
+
+    for key in [key for key in _local_cache if key[1] != version]:
+        _local_cache.pop(key, None)
+    _local_cache[(name, version)] = data
+    return data
+
+
+def conditional_reference_response(request, state, build_data, etag_prefix):
+    """304 when the client already has this version, otherwise the data with ETag/Last-Modified."""
+    etag = quote_etag(f"{etag_prefix}-{state['version']}")
+    last_modified = int(state['updated_at'].timestamp())
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    response = Response(build_data())
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
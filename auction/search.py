@@ -0,0 +1,34 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import F, Q
+
+SEARCH_CONFIG = 'simple'
+
+
+def search_lots(lots, term):
+    """
+    Filters lots by `term` over Lot.search_document. Returns (queryset, ranked).
+
+    On PostgreSQL this is full-text search plus trigram word similarity (for typos and
+    partial names), both backed by GIN indexes from migration 0004, and the result is
+    annotated with a relevance score. Other databases (SQLite in tests) fall back to an
+    unranked icontains on the same single column.
+    """
+    if connection.vendor != 'postgresql':
+        return lots.filter(search_document__icontains=term), False
+
+    # the vector must match the expression index in migration 0004 exactly
+    vector = SearchVector('search_document', config=SEARCH_CONFIG)
+    query = SearchQuery(term, config=SEARCH_CONFIG, search_type='websearch')
+
+    lots = lots.annotate(
+        search_vector=vector,
+        search_rank=SearchRank(vector, query) + TrigramWordSimilarity(term, 'search_document'),
+    ).filter(
+        Q(search_vector=query) | Q(search_document__trigram_word_similar=term)
+    )
+    return lots, True
+
+
+def order_by_rank(lots):
+    return lots.order_by(F('search_rank').desc(), '-created_at', '-id')
@@ -1,10 +1,9 @@
-from datetime import timedelta
-
-from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator, UniqueValidator
 
+from auction.ratelimit import get_rate_limit
 from user.models import Year, Gender, UserPhotos
+from user.storage import file_url, upload_url
 from .models import (
     Role, Faculty, Major, Lot, Bid, Comment, Themes, Complaints
 )
@@ -55,7 +54,102 @@ class ComplaintsSerializer(serializers.ModelSerializer):
         fields = ["id", "user", "theme", "text"]
 
 
-class LotSerializer(serializers.ModelSerializer):
+class CommentThreadSerializer(serializers.ModelSerializer):
+    user_name = serializers.SerializerMethodField()
+    bid = serializers.SerializerMethodField()
+    created_at = serializers.ReadOnlyField()
+    user_avatar = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Comment
+        fields = ["id", "user_name", "text", "bid", "created_at", "parent", "user_avatar"]
+
+    def get_user_name(self, obj):
+        return obj.author_name
+
+    def get_bid(self, obj):
+        return obj.bid_amount
+
+    def get_user_avatar(self, obj):
+        return obj.author_avatar_url or None
+
+
+class CommentWithRepliesSerializer(CommentThreadSerializer):
+    replies = serializers.SerializerMethodField()
+
+    class Meta(CommentThreadSerializer.Meta):
+        fields = CommentThreadSerializer.Meta.fields + ["replies"]
+
+    def get_replies(self, obj):
+        replies = self.context.get('replies', {}).get(obj.id, [])
+        return CommentThreadSerializer(replies, many=True, context=self.context).data
+
+
+class LotPhotosMixin:
+    def _ordered_photos(self, obj):
+        # reads the prefetch cache when the lot comes from Lot.objects.with_relations()
+        return sorted(obj.user.user_photos.all(), key=lambda photo: (photo.created_at, photo.id))
+
+    def get_photos(self, obj):
+        request = self.context.get('request')
+        return [file_url(photo.photo_url, photo.photo, request) for photo in self._ordered_photos(obj)]
+
+    def get_main_photo(self, obj):
+        photos = self._ordered_photos(obj)
+        if not photos:
+            return None
+
+        main_photo = photos[0]
+        request = self.context.get('request')
+        if main_photo.thumbnail:
+            return file_url(main_photo.thumbnail_url, main_photo.thumbnail, request)
+        return file_url(main_photo.photo_url, main_photo.photo, request)
+
+
+class LotFeedSerializer(serializers.ModelSerializer):
+    # reads only auction_lot columns and the annotations of Lot.objects.for_feed()
+    first_name = serializers.SerializerMethodField()
+    last_name = serializers.SerializerMethodField()
+    faculty = serializers.SerializerMethodField()
+    main_photo = serializers.SerializerMethodField()
+    comment_count = serializers.IntegerField(read_only=True)
+    latest_bid = serializers.SerializerMethodField()
+    lot_number = serializers.IntegerField(source='id', read_only=True)
+
+    class Meta:
+        model = Lot
+        fields = [
+            "id", "lot_number", "first_name", "last_name", "faculty", "last_bet",
+            "main_photo", "comment_count", "latest_bid"
+        ]
+
+    def get_first_name(self, obj):
+        return obj.first_name
+
+    def get_last_name(self, obj):
+        return obj.last_name
+
+    def get_faculty(self, obj):
+        return obj.faculty_name or None
+
+    def get_main_photo(self, obj):
+        if obj.main_photo_url:
+            return obj.main_photo_url
+        if not obj.main_photo_name:
+            return None
+        return upload_url(UserPhotos._meta.get_field('photo'), obj.main_photo_name, self.context.get('request'))
+
+    def get_latest_bid(self, obj):
+        # bids only ever raise last_bet, so the latest bid is the highest one
+        if not obj.bid_count:
+            return None
+        return {
+            'amount': obj.last_bet,
+            'created_at': obj.last_bid_at,
+        }
+
+
+class LotSerializer(LotPhotosMixin, serializers.ModelSerializer):
     first_name = serializers.SerializerMethodField()
     last_name = serializers.SerializerMethodField()
 
@@ -88,52 +182,11 @@ class LotSerializer(serializers.ModelSerializer):
     def get_last_name(self, obj):
         return obj.last_name
 
-    def get_photos(self, obj):
-        request = self.context.get('request')
-        photos = UserPhotos.objects.filter(user=obj.user)
-        if request:
-            return [request.build_absolute_uri(photo.photo.url) for photo in photos]
-        return [photo.photo.url for photo in photos]
-
-    def get_main_photo(self, obj):
-        request = self.context.get('request')
-        first_photo = UserPhotos.objects.filter(user=obj.user).order_by('created_at').first()
-
-        if first_photo:
-            if request:
-                return request.build_absolute_uri(first_photo.photo.url)
-            return first_photo.photo.url
-
-        return None
-
     def get_comments(self, obj):
-        request = self.context.get('request')
-        comments = Comment.objects.filter(lot=obj).select_related('user').order_by('created_at')
-
-        result = []
-        for c in comments:
-            comment_data = {
-                'id': c.id,
-                'user_name': f"{c.user.first_name} {c.user.last_name}",
-                'text': c.text,
-                'bid': c.bid.amount if c.bid else None,
-                'created_at': c.created_at,
-                'parent': c.parent_id,
-                'user_avatar': None
-            }
-
-            if c.user.profile_pic:
-                if request:
-                    comment_data['user_avatar'] = request.build_absolute_uri(c.user.profile_pic.url)
-                else:
-                    comment_data['user_avatar'] = c.user.profile_pic.url
-
-            result.append(comment_data)
-
-        return result
+        return CommentThreadSerializer(obj.comment_set.all(), many=True, context=self.context).data
 
 
-class MyLotSerializer(serializers.Serializer):
+class MyLotSerializer(LotPhotosMixin, serializers.Serializer):
     id = serializers.IntegerField(read_only=True)
     lot_number = serializers.IntegerField(source='id', read_only=True)
     last_bet = serializers.IntegerField(read_only=True)
@@ -195,23 +248,20 @@ class MyLotSerializer(serializers.Serializer):
 
     def get_photos(self, obj):
         request = self.context.get('request')
-        photos = UserPhotos.objects.filter(user=obj.user).order_by('created_at')
 
         result = []
-        for photo in photos:
-            url = request.build_absolute_uri(photo.photo.url) if request else photo.photo.url
+        for photo in self._ordered_photos(obj):
             result.append({
                 'id': photo.id,
-                'url': url
+                'url': file_url(photo.photo_url, photo.photo, request)
             })
         return result
 
     def get_photos_count(self, obj):
-        return UserPhotos.objects.filter(user=obj.user).count()
+        return obj.photo_count
 
     def get_can_upload_more(self, obj):
-        count = UserPhotos.objects.filter(user=obj.user).count()
-        return count < 5
+        return obj.photo_count < Lot.MAX_PHOTOS
 
     def validate(self, attrs):
         faculty = attrs.get('faculty')
@@ -264,18 +314,25 @@ class MyLotSerializer(serializers.Serializer):
         return lot
 
     def update(self, lot, validated_data):
+        # only the edited columns are written: the owner copies and the photo/bid counters are kept
+        # in the database by signals and F() updates, so this instance's values may be stale
+        lot_fields = []
         if 'first_name' in validated_data:
             lot.display_first_name = validated_data.pop('first_name')
+            lot_fields.append('display_first_name')
 
         if 'last_name' in validated_data:
             lot.display_last_name = validated_data.pop('last_name')
+            lot_fields.append('display_last_name')
 
         user = lot.user
         user_fields = ['faculty', 'major', 'year', 'gender', 'role']
+        owner_edited = False
 
         for field in user_fields:
             if field in validated_data:
                 setattr(user, field, validated_data.pop(field))
+                owner_edited = True
 
         if 'soundcloud_url' in validated_data:
             user.soundcloud = validated_data.pop('soundcloud_url')
@@ -285,11 +342,16 @@ class MyLotSerializer(serializers.Serializer):
             user.instagram = validated_data.pop('instagram_url')
 
         user.save()
+        if owner_edited:
+            # sync_lot_owner_fields has just rewritten them in the database
+            lot.refresh_from_db(fields=Lot.OWNER_FIELDS)
 
         for attr, value in validated_data.items():
             setattr(lot, attr, value)
+            lot_fields.append(attr)
 
-        lot.save()
+        if lot_fields:
+            lot.save(update_fields=lot_fields)
 
         return lot
 
@@ -318,6 +380,29 @@ class BidSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class BidHistorySerializer(serializers.ModelSerializer):
+    user_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Bid
+        fields = ["id", "user", "user_name", "amount", "created_at", "is_overbid"]
+
+    def get_user_name(self, obj):
+        return f"{obj.user.first_name} {obj.user.last_name}"
+
+
+class LotBidStatsSerializer(serializers.ModelSerializer):
+    unique_bidders = serializers.IntegerField(source='bidder_count', read_only=True)
+    max_bid = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Lot
+        fields = ["bid_count", "unique_bidders", "max_bid", "last_bid_at"]
+
+    def get_max_bid(self, obj):
+        return obj.last_bet if obj.bid_count else None
+
+
 class CommentSerializer(serializers.ModelSerializer):
     ANTI_SPAM_MAX = 5
     ANTI_SPAM_WINDOW_MIN = 1
@@ -348,15 +433,12 @@ class CommentSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Parent comment must belong to the same lot.")
 
         if user:
-            window_start = timezone.now() - timedelta(minutes=self.ANTI_SPAM_WINDOW_MIN)
-            recent_count = Comment.objects.filter(
-                user=user,
-                created_at__gte=window_start
-            ).count()
-            if recent_count >= self.ANTI_SPAM_MAX:
+            # RATE_LIMITS['comment'] overrides the ANTI_SPAM defaults
+            rate_limit = get_rate_limit('comment', default=(self.ANTI_SPAM_MAX, self.ANTI_SPAM_WINDOW_MIN * 60))
+            if not rate_limit.hit(user.pk):
                 raise serializers.ValidationError(
-                    f"Rate limit exceeded: at most {self.ANTI_SPAM_MAX} comments per "
-                    f"{self.ANTI_SPAM_WINDOW_MIN} minute(s)."
+                    f"Rate limit exceeded: at most {rate_limit.limit} comments per "
+                    f"{rate_limit.window // 60} minute(s)."
                 )
 
         return attrs
@@ -0,0 +1,40 @@
+from django.db import transaction
+from rest_framework import serializers
+
+from auction.models import Lot, Bid, UserLotPosition
+from auction.serializers import BidSerializer
+
+
+def place_bid(user, lot_id, amount):
+    """
+    Validates and stores a bid as one transaction.
+
+    The lot row is locked first, so concurrent bids on the same lot are validated one
+    after another against the current last_bet instead of a stale copy.
+    Returns (bid, previous_bid); previous_bid is the highest bid before this one or None.
+    """
+    with transaction.atomic():
+        lot = Lot.objects.select_for_update().get(pk=lot_id)
+        previous_bid = Bid.objects.filter(lot=lot).order_by('-amount').first()
+
+        bid_serializer = BidSerializer(data={"user": user.id, "lot": lot.id, "amount": amount})
+        bid_serializer.is_valid(raise_exception=True)
+        bid = bid_serializer.save()
+
+        # guard for backends without row locks: only raise last_bet, never lower it
+        updated = Lot.objects.filter(pk=lot.pk, last_bet__lt=bid.amount).update(last_bet=bid.amount)
+        if not updated:
+            raise serializers.ValidationError("Bid was outbid by a concurrent bid, please try again.")
+
+        Bid.objects.filter(lot=lot, is_overbid=False).exclude(id=bid.id).update(is_overbid=True)
+
+        # the bidder's position now points at this bid; everyone else on the lot is overbid
+        UserLotPosition.objects.bulk_create(
+            [UserLotPosition(user=user, lot=lot, bid=bid, amount=bid.amount, bid_at=bid.created_at)],
+            update_conflicts=True,
+            unique_fields=['user', 'lot'],
+            update_fields=['bid', 'amount', 'bid_at', 'is_overbid'],
+        )
+        UserLotPosition.objects.filter(lot=lot, is_overbid=False).exclude(user=user).update(is_overbid=True)
+
+    return bid, previous_bid
@@ -0,0 +1,80 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from auction.models import Lot, Faculty, Role
+from auction.reference import REFERENCE_MODELS, invalidate_reference_data
+from user.models import CustomUser, Gender, Year
+
+
+def reference_data_changed(sender, **kwargs):
+    invalidate_reference_data()
+
+
+for model in REFERENCE_MODELS:
+    post_save.connect(reference_data_changed, sender=model, dispatch_uid=f'reference_save_{model.__name__}')
+    post_delete.connect(reference_data_changed, sender=model, dispatch_uid=f'reference_delete_{model.__name__}')
+
+
+# CustomUser fields copied onto lots; other saves (e.g. the last_login update) skip the sync
+OWNER_SOURCE_FIELDS = {
+    'first_name', 'last_name', 'faculty', 'gender', 'year', 'role',
+    'faculty_id', 'gender_id', 'year_id', 'role_id',
+}
+
+
+@receiver(post_save, sender=CustomUser, dispatch_uid='sync_lot_owner_fields')
+def sync_lot_owner_fields(sender, instance, created, update_fields=None, **kwargs):
+    # lots carry copies of their owner's names and filter attributes (see Lot.OWNER_FIELDS)
+    if created or (update_fields is not None and not OWNER_SOURCE_FIELDS & set(update_fields)):
+        return
+    # only lots whose copies are out of date; the copied reference names follow the ids
+    lots = list(Lot.objects.filter(user=instance).exclude(
+        owner_first_name=instance.first_name,
+        owner_last_name=instance.last_name,
+        faculty_id=instance.faculty_id,
+        gender_id=instance.gender_id,
+        year_id=instance.year_id,
+        role_id=instance.role_id,
+    ))
+    if not lots:
+        return
+
+    values = Lot.owner_values(instance)
+    for lot in lots:
+        for field, value in values.items():
+            setattr(lot, field, value)
+        Lot.objects.filter(pk=lot.pk).update(**values, search_document=lot.build_search_document())
+
+
+# reference rows renamed or deleted in the admin: refresh the copied display names
+OWNER_NAME_SOURCES = [
+    (Faculty, 'faculty', 'faculty_name', 'name'),
+    (Gender, 'gender', 'gender_name', 'gender'),
+    (Year, 'year', 'year_name', 'year'),
+    (Role, 'role', 'role_name', 'name'),
+]
+
+
+def make_owner_name_sync(lot_field, name_field, source_attr):
+    def sync_owner_name(sender, instance, created, **kwargs):
+        if not created:
+            Lot.objects.filter(**{lot_field: instance}).update(**{name_field: getattr(instance, source_attr)})
+    return sync_owner_name
+
+
+def make_owner_name_clear(lot_field, name_field):
+    def clear_owner_name(sender, instance, **kwargs):
+        # the lots' foreign key was already set to NULL by the delete
+        Lot.objects.filter(**{f'{lot_field}__isnull': True}).exclude(**{name_field: ''}).update(**{name_field: ''})
+    return clear_owner_name
+
+
+for model, lot_field, name_field, source_attr in OWNER_NAME_SOURCES:
+    post_save.connect(
+        make_owner_name_sync(lot_field, name_field, source_attr),
+        sender=model, weak=False, dispatch_uid=f'sync_lot_{name_field}',
+    )
+    post_delete.connect(
+        make_owner_name_clear(lot_field, name_field),
+        sender=model, weak=False, dispatch_uid=f'clear_lot_{name_field}',
+    )
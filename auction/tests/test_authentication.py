@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from auction.models import Lot
+
+User = get_user_model()
+
+
+@override_settings(AUTH_USER_CACHE_ALLOW_LOCAL=True)
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="u@ukma.edu.ua", password="x")
+        self.owner = User.objects.create_user(email="owner@ukma.edu.ua", password="x")
+        self.lot = Lot.objects.create(user=self.owner, last_bet=0)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def user_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        return [q["sql"] for q in ctx.captured_queries if '"user_customuser"' in q["sql"]]
+
+    def test_hot_requests_run_no_auth_queries(self):
+        self.assertEqual(len(self.user_queries(reverse("homepage"))), 1)
+
+        self.assertEqual(self.user_queries(reverse("homepage")), [])
+        self.assertEqual(self.user_queries(reverse("my_bids")), [])
+
+    @override_settings(AUTH_USER_CACHE_ALLOW_LOCAL=False)
+    def test_local_memory_cache_is_not_used_by_default(self):
+        self.user_queries(reverse("homepage"))
+
+        self.assertEqual(len(self.user_queries(reverse("homepage"))), 1)
+
+    def test_ban_takes_effect_immediately(self):
+        url = reverse("lot_detail", kwargs={"pk": self.lot.id})
+        self.assertEqual(self.client.post(url, {"text": "hi"}, format="json").status_code, 201)
+
+        user = User.objects.get(pk=self.user.pk)
+        user.is_banned = True
+        user.save()
+
+        self.assertEqual(self.client.post(url, {"text": "hi again"}, format="json").status_code, 403)
+
+    def test_profile_edit_is_seen_by_the_next_request(self):
+        self.client.patch(reverse("profile"), {"first_name": "Renamed"}, format="json")
+
+        resp = self.client.get(reverse("profile"))
+
+        self.assertEqual(resp.data["first_name"], "Renamed")
+
+    def test_deleted_user_is_rejected(self):
+        self.client.get(reverse("homepage"))
+        User.objects.filter(pk=self.user.pk).delete()
+
+        self.assertEqual(self.client.get(reverse("homepage")).status_code, 401)
@@ -0,0 +1,45 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from auction.feed import FEED_FILTERS, FEED_SORTS
+from auction.models import Comment, Lot
+
+User = get_user_model()
+
+
+class ExplainFeedQueriesCommandTests(TestCase):
+    def test_reports_every_filter_and_sort_combination(self):
+        out = StringIO()
+        call_command("explain_feed_queries", "--disable-seqscan", stdout=out)
+
+        lines = out.getvalue().splitlines()
+        # every sort alone, with each FEED_FILTERS entry, and with has_photo
+        self.assertEqual(len(lines), len(FEED_SORTS) * (len(FEED_FILTERS) + 2))
+
+    def test_sorts_use_the_composite_lot_indexes(self):
+        out = StringIO()
+        call_command("explain_feed_queries", "--disable-seqscan", "--fail-on-full-scan", stdout=out)
+
+        report = out.getvalue()
+        self.assertIn("sort=price_asc  (lot_last_bet_id_idx)", report)
+        self.assertIn("sort=created_at_desc  (lot_created_at_id_idx)", report)
+
+
+class BackfillCommentAuthorsCommandTests(TestCase):
+    def test_fills_missing_author_snapshots(self):
+        user = User.objects.create_user(
+            email="u@ukma.edu.ua", password="x", first_name="A", last_name="B",
+            profile_pic_url="https://cdn.test/p.jpg",
+        )
+        lot = Lot.objects.create(user=user)
+        comment = Comment.objects.create(user=user, lot=lot, text="hi")
+        Comment.objects.filter(pk=comment.pk).update(author_name="", author_avatar_url="")
+
+        call_command("backfill_comment_authors", stdout=StringIO())
+
+        comment.refresh_from_db()
+        self.assertEqual(comment.author_name, "A B")
+        self.assertEqual(comment.author_avatar_url, "https://cdn.test/p.jpg")
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from auction.events import InProcessBroker, format_event, get_broker
+from auction.models import Lot
+
+User = get_user_model()
+
+
+class InProcessBrokerTests(TestCase):
+    async def test_delivers_frames_published_from_other_threads(self):
+        broker = InProcessBroker()
+
+        subscription = broker.subscribe(1)
+        publisher = threading.Thread(target=broker.publish, args=(1, "frame"))
+        publisher.start()
+        publisher.join()
+        broker.publish(2, "other lot")
+
+        self.assertEqual(await asyncio.wait_for(subscription.get(), 1), "frame")
+        self.assertTrue(subscription.queue.empty())
+        self.assertEqual(broker.subscriber_count(1), 1)
+
+        subscription.close()
+        self.assertEqual(broker.subscriber_count(1), 0)
+
+    async def test_slow_subscriber_drops_frames_instead_of_buffering(self):
+        broker = InProcessBroker()
+        broker.queue_size = 2
+
+        subscription = broker.subscribe(1)
+        for i in range(5):
+            broker.publish(1, f"frame {i}")
+        await asyncio.sleep(0)
+
+        self.assertEqual(subscription.queue.qsize(), 2)
+        subscription.close()
+
+
+class LotEventPublishingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.owner = User.objects.create_user(email="owner@ukma.edu.ua", password="x")
+        self.bidder = User.objects.create_user(email="b@ukma.edu.ua", password="x", first_name="A", last_name="B")
+        self.lot = Lot.objects.create(user=self.owner, last_bet=0)
+        self.client.force_authenticate(user=self.bidder)
+        self.url = reverse("lot_detail", kwargs={"pk": self.lot.id})
+
+        patcher = patch.object(get_broker(), "publish")
+        self.publish = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def published_frames(self):
+        return [frame for (lot_id, frame), _ in self.publish.call_args_list if lot_id == self.lot.id]
+
+    def test_bid_with_text_publishes_bid_and_comment_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            resp = self.client.post(self.url, {"amount": 10, "text": "hi"}, format="json")
+            self.publish.assert_not_called()
+
+        self.assertEqual(resp.status_code, 201)
+        for callback in callbacks:
+            callback()
+
+        bid_frame, comment_frame = self.published_frames()
+        self.assertTrue(bid_frame.startswith("event: bid\n"))
+        self.assertIn('"amount": 10', bid_frame)
+        self.assertTrue(comment_frame.startswith("event: comment\n"))
+        self.assertIn('"user_name": "A B"', comment_frame)
+        self.assertIn('"bid": 10', comment_frame)
+
+    def test_comment_publishes_an_event(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, {"text": "hello"}, format="json")
+
+        [frame] = self.published_frames()
+        self.assertIn('"text": "hello"', frame)
+
+    def test_rejected_bid_publishes_nothing(self):
+        Lot.objects.filter(pk=self.lot.pk).update(last_bet=100)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(self.url, {"amount": 50}, format="json")
+
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(self.published_frames(), [])
+
+
+class LotEventsStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="u@ukma.edu.ua", password="x")
+        cls.lot = Lot.objects.create(user=cls.user, last_bet=0)
+        cls.auth = {"Authorization": f"Bearer {AccessToken.for_user(cls.user)}"}
+
+    def setUp(self):
+        cache.clear()
+        self.client = AsyncClient()
+
+    async def test_streams_published_events(self):
+        response = await self.client.get(reverse("lot_events", kwargs={"pk": self.lot.id}), headers=self.auth)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b": subscribed\n\n")
+
+        frame = format_event("bid", {"id": 1, "amount": 10})
+        get_broker().publish(self.lot.id, frame)
+        self.assertEqual(await asyncio.wait_for(anext(chunks), 1), frame.encode())
+        await chunks.aclose()
+
+    def test_refused_outside_asgi(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        response = client.get(reverse("lot_events", kwargs={"pk": self.lot.id}))
+
+        self.assertEqual(response.status_code, 501)
+
+    async def test_missing_lot_returns_404(self):
+        response = await self.client.get(reverse("lot_events", kwargs={"pk": self.lot.id + 100}), headers=self.auth)
+
+        self.assertEqual(response.status_code, 404)
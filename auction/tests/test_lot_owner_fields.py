@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from auction.models import Lot, Faculty, Role
+from user.models import Gender, Year
+
+User = get_user_model()
+
+
+class LotOwnerFieldsTests(TestCase):
+    def setUp(self):
+        self.faculty = Faculty.objects.create(name="FI")
+        self.gender = Gender.objects.create(gender="female")
+        self.year = Year.objects.create(year="2")
+        self.role = Role.objects.create(name="Student")
+        self.user = User.objects.create_user(
+            email="owner@ukma.edu.ua", password="x", first_name="Olena", last_name="Koval",
+            faculty=self.faculty, gender=self.gender, year=self.year, role=self.role,
+        )
+        self.lot = Lot.objects.create(user=self.user, last_bet=0)
+
+    def test_lot_copies_owner_attributes_on_create(self):
+        self.lot.refresh_from_db()
+        self.assertEqual(self.lot.owner_first_name, "Olena")
+        self.assertEqual(self.lot.faculty_id, self.faculty.id)
+        self.assertEqual(self.lot.gender_id, self.gender.id)
+        self.assertEqual(self.lot.year_id, self.year.id)
+        self.assertEqual(self.lot.role_id, self.role.id)
+        self.assertEqual(self.lot.faculty_name, "FI")
+        self.assertEqual(self.lot.year_name, "2")
+
+    def test_profile_change_updates_lot(self):
+        other_faculty = Faculty.objects.create(name="FEN")
+        self.user.first_name = "Olha"
+        self.user.faculty = other_faculty
+        self.user.role = None
+        self.user.save()
+
+        self.lot.refresh_from_db()
+        self.assertEqual(self.lot.owner_first_name, "Olha")
+        self.assertEqual(self.lot.faculty_id, other_faculty.id)
+        self.assertEqual(self.lot.faculty_name, "FEN")
+        self.assertIsNone(self.lot.role_id)
+        self.assertEqual(self.lot.role_name, "")
+        self.assertIn("Olha", self.lot.search_document)
+
+    def test_renaming_reference_row_updates_lot(self):
+        self.faculty.name = "Faculty of Informatics"
+        self.faculty.save()
+        self.gender.gender = "F"
+        self.gender.save()
+
+        self.lot.refresh_from_db()
+        self.assertEqual(self.lot.faculty_name, "Faculty of Informatics")
+        self.assertEqual(self.lot.gender_name, "F")
+
+    def test_deleting_reference_row_clears_lot_name(self):
+        # users are deleted with their reference rows, so only a copy the owner no longer matches survives
+        staff = Role.objects.create(name="Staff")
+        Lot.objects.filter(pk=self.lot.pk).update(role=staff, role_name="Staff")
+        staff.delete()
+
+        self.lot.refresh_from_db()
+        self.assertIsNone(self.lot.role_id)
+        self.assertEqual(self.lot.role_name, "")
+
+    def test_saves_without_owner_changes_do_not_touch_lots(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.user.save(update_fields=["last_login"])
+            self.user.save()
+
+        self.assertFalse(any('"auction_lot"' in q["sql"] and "UPDATE" in q["sql"] for q in ctx.captured_queries))
+
+    def test_lot_save_reloads_owner_only_when_owner_changes(self):
+        lot = Lot.objects.get(pk=self.lot.pk)
+        lot.description = "hello"
+        with self.assertNumQueries(1):
+            lot.save(update_fields=["description"])
+
+        other = User.objects.create_user(email="new@ukma.edu.ua", password="x", first_name="Taras")
+        lot.user = other
+        lot.save()
+        lot.refresh_from_db()
+        self.assertEqual(lot.owner_first_name, "Taras")
+        self.assertIsNone(lot.faculty_id)
+        self.assertEqual(lot.faculty_name, "")
+
+    def test_mylot_edit_of_owner_attributes_reaches_the_lot(self):
+        other_faculty = Faculty.objects.create(name="FEN")
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        resp = client.patch(reverse("my_lot"), {"faculty": other_faculty.id, "description": "hi"}, format="json")
+
+        self.assertEqual(resp.status_code, 200)
+        self.lot.refresh_from_db()
+        self.assertEqual((self.lot.faculty_id, self.lot.faculty_name), (other_faculty.id, "FEN"))
+        self.assertEqual(self.lot.description, "hi")
+        feed = client.get(reverse("homepage"), {"faculty": other_faculty.id}).data["results"]
+        self.assertEqual([lot["id"] for lot in feed], [self.lot.id])
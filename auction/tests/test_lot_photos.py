@@ -0,0 +1,457 @@
+import threading
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from cloudinary_storage.storage import MediaCloudinaryStorage
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+
+from auction.models import Comment, Lot
+from auction.serializers import MyLotSerializer
+from user.models import UserPhotos
+from user.storage import InMemoryPhotoStorage
+from user.thumbnails import PHOTO_THUMBNAIL_SIZE, AVATAR_THUMBNAIL_SIZE, THUMBNAIL_EXTENSION
+
+User = get_user_model()
+
+
+def image(name="a.jpg", size=(1200, 900)):
+    buffer = BytesIO()
+    Image.new("RGB", size, "red").save(buffer, "JPEG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+
+def patch_cloudinary(test):
+    for name, replacement in [
+        ("_upload", lambda storage, name, content: {"public_id": name}),
+        ("url", lambda storage, name: f"https://cdn.test/{name}"),
+    ]:
+        patcher = patch.object(MediaCloudinaryStorage, name, replacement)
+        patcher.start()
+        test.addCleanup(patcher.stop)
+
+
+class LotPhotoCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="u@ukma.edu.ua", password="x")
+        self.lot = Lot.objects.create(user=self.user, last_bet=0)
+        self.client.force_authenticate(user=self.user)
+        patch_cloudinary(self)
+
+    def test_upload_and_delete_keep_photo_count(self):
+        resp = self.client.post(reverse("upload_lot_photo"), {"photo": [image(), image("b.jpg")]}, format="multipart")
+        self.assertEqual(resp.status_code, 201)
+        self.lot.refresh_from_db()
+        self.assertEqual(self.lot.photo_count, 2)
+
+        photo = UserPhotos.objects.filter(user=self.user).first()
+        resp = self.client.delete(reverse("upload_lot_photo"), {"photo_id": photo.id}, format="json")
+        self.assertEqual(resp.status_code, 204)
+        self.lot.refresh_from_db()
+        self.assertEqual(self.lot.photo_count, 1)
+
+    def test_new_lot_counts_existing_photos(self):
+        other = User.objects.create_user(email="v@ukma.edu.ua", password="x")
+        UserPhotos.objects.create(user=other, photo="photos/a.jpg")
+
+        lot = Lot.objects.create(user=other, last_bet=0)
+        self.assertEqual(lot.photo_count, 1)
+
+    def test_has_photo_filter(self):
+        without_photo = Lot.objects.create(user=User.objects.create_user(email="v@ukma.edu.ua", password="x"))
+        self.client.post(reverse("upload_lot_photo"), {"photo": [image()]}, format="multipart")
+
+        resp = self.client.get(reverse("homepage"), {"has_photo": "true"})
+
+        self.assertEqual(resp.status_code, 200)
+        ids = [lot["id"] for lot in resp.data["results"]]
+        self.assertEqual(ids, [self.lot.id])
+        self.assertNotIn(without_photo.id, ids)
+
+    def test_lot_edits_keep_photos_counted_since_the_lot_was_loaded(self):
+        # a MyLot edit and an admin save, each racing an upload
+        in_mylot, in_admin = Lot.objects.get(pk=self.lot.pk), Lot.objects.get(pk=self.lot.pk)
+        self.client.post(reverse("upload_lot_photo"), {"photo": [image(), image("b.jpg")]}, format="multipart")
+
+        in_admin.last_bet = 5
+        in_admin.save()
+        serializer = MyLotSerializer(in_mylot, data={"description": "edited"}, partial=True, context={"user": self.user})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+
+        self.lot.refresh_from_db()
+        self.assertEqual(self.lot.photo_count, 2)
+        self.assertEqual((self.lot.description, self.lot.last_bet), ("edited", 5))
+
+    def test_upload_over_the_cap_is_rejected(self):
+        self.client.post(reverse("upload_lot_photo"), {"photo": [image() for _ in range(4)]}, format="multipart")
+
+        resp = self.client.post(reverse("upload_lot_photo"), {"photo": [image(), image()]}, format="multipart")
+
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("У вас вже 4 фото", resp.data["detail"])
+        self.lot.refresh_from_db()
+        self.assertEqual(self.lot.photo_count, 4)
+        self.assertEqual(UserPhotos.objects.filter(user=self.user).count(), 4)
+
+    def test_my_lot_reads_photos_with_one_query(self):
+        self.client.post(reverse("upload_lot_photo"), {"photo": [image(), image()]}, format="multipart")
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse("my_lot"))
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["photos_count"], 2)
+        self.assertTrue(resp.data["can_upload_more"])
+        self.assertEqual(len(resp.data["photos"]), 2)
+        photo_queries = [q for q in ctx.captured_queries if '"user_userphotos"' in q["sql"]]
+        self.assertEqual(len(photo_queries), 1)
+
+
+class ParallelPhotoUploadTests(TestCase):
+    LATENCY = 0.2
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="u@ukma.edu.ua", password="x")
+        self.lot = Lot.objects.create(user=self.user, last_bet=0)
+        self.client.force_authenticate(user=self.user)
+
+        self.storage = InMemoryPhotoStorage(latency=self.LATENCY)
+        for model, field in [
+            (UserPhotos, "photo"), (UserPhotos, "thumbnail"),
+            (User, "profile_pic"), (User, "profile_pic_thumbnail"),
+        ]:
+            patcher = patch.object(model._meta.get_field(field), "storage", self.storage)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        # how many saves run at once, which saves succeeded, and optionally failing thumbnail saves
+        self.active = self.max_active = 0
+        self.saved = []
+        self.fail_thumbnails = False
+        lock = threading.Lock()
+        save = self.storage._save
+
+        def tracked_save(name, content):
+            with lock:
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+            try:
+                if self.fail_thumbnails and name.endswith(THUMBNAIL_EXTENSION):
+                    raise OSError("storage down")
+                name = save(name, content)
+                self.saved.append(name)
+                return name
+            finally:
+                with lock:
+                    self.active -= 1
+
+        patcher = patch.object(self.storage, "_save", tracked_save)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def upload(self, count):
+        return self.client.post(
+            reverse("upload_lot_photo"), {"photo": [image() for _ in range(count)]}, format="multipart"
+        )
+
+    def assert_nothing_left_in_storage(self):
+        self.assertTrue(self.saved)
+        self.assertEqual([name for name in self.saved if self.storage.exists(name)], [])
+
+    def test_photos_upload_concurrently(self):
+        resp = self.upload(5)
+
+        self.assertEqual(resp.status_code, 201)
+        self.assertGreater(self.max_active, 1)
+        rows = UserPhotos.objects.filter(user=self.user).order_by("id")
+        names = [row.photo.name for row in rows]
+        thumbnails = [row.thumbnail.name for row in rows]
+        self.assertEqual(len(set(names)), 5)
+        self.assertEqual(set(names) | set(thumbnails), set(self.storage.files))
+        self.assertEqual(resp.data["photos"], [f"https://photos.test/{name}" for name in names])
+
+    @override_settings(PHOTO_UPLOAD_WORKERS=1)
+    def test_single_worker_uploads_sequentially(self):
+        resp = self.upload(3)
+
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(self.max_active, 1)
+        self.assertEqual(len(self.saved), 6)
+
+    def test_failed_upload_releases_the_reserved_slots(self):
+        with patch.object(self.storage, "_save", side_effect=OSError("storage down")):
+            with self.assertRaises(OSError):
+                self.upload(2)
+
+        self.lot.refresh_from_db()
+        self.assertEqual(self.lot.photo_count, 0)
+        self.assertFalse(UserPhotos.objects.exists())
+
+    def test_partly_failed_upload_deletes_the_stored_files(self):
+        self.fail_thumbnails = True
+        with self.assertRaises(OSError):
+            self.upload(2)
+
+        self.assert_nothing_left_in_storage()
+        self.lot.refresh_from_db()
+        self.assertEqual(self.lot.photo_count, 0)
+
+    def test_files_are_deleted_when_their_rows_cant_be_saved(self):
+        with patch.object(UserPhotos.objects, "bulk_create", side_effect=DatabaseError("insert failed")):
+            with self.assertRaises(DatabaseError):
+                self.upload(2)
+
+        self.assert_nothing_left_in_storage()
+        self.lot.refresh_from_db()
+        self.assertEqual(self.lot.photo_count, 0)
+
+    def test_new_avatar_replaces_the_old_files_only_once_saved(self):
+        url = reverse("upload_profile_photo")
+        self.client.post(url, {"photo": image("old.jpg")}, format="multipart")
+        self.user.refresh_from_db()
+        old = [self.user.profile_pic.name, self.user.profile_pic_thumbnail.name]
+
+        with patch.object(User, "save", side_effect=DatabaseError("update failed")):
+            with self.assertRaises(DatabaseError):
+                self.client.post(url, {"photo": image("new.jpg")}, format="multipart")
+        self.assertEqual({name for name in self.saved if self.storage.exists(name)}, set(old))
+
+        self.user.refresh_from_db()
+        self.client.post(url, {"photo": image("new.jpg")}, format="multipart")
+        self.user.refresh_from_db()
+        self.assertEqual(
+            {name for name in self.saved if self.storage.exists(name)},
+            {self.user.profile_pic.name, self.user.profile_pic_thumbnail.name},
+        )
+        self.assertNotIn(old[0], self.storage.files)
+
+
+class PhotoThumbnailTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="u@ukma.edu.ua", password="x")
+        self.lot = Lot.objects.create(user=self.user, last_bet=0)
+        self.client.force_authenticate(user=self.user)
+
+        self.storage = InMemoryPhotoStorage()
+        for model, field in [
+            (UserPhotos, "photo"), (UserPhotos, "thumbnail"),
+            (User, "profile_pic"), (User, "profile_pic_thumbnail"),
+        ]:
+            patcher = patch.object(model._meta.get_field(field), "storage", self.storage)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def stored_image(self, name):
+        return Image.open(BytesIO(self.storage.files[name]))
+
+    def test_lot_photo_upload_stores_a_thumbnail(self):
+        resp = self.client.post(reverse("upload_lot_photo"), {"photo": [image()]}, format="multipart")
+        self.assertEqual(resp.status_code, 201)
+
+        photo = UserPhotos.objects.get()
+        self.assertTrue(photo.thumbnail.name.endswith(THUMBNAIL_EXTENSION))
+        self.assertEqual(self.stored_image(photo.thumbnail.name).size, PHOTO_THUMBNAIL_SIZE)
+        self.assertEqual(self.stored_image(photo.photo.name).size, (1200, 900))
+
+    def test_feed_and_lot_detail_show_the_thumbnail(self):
+        self.client.post(reverse("upload_lot_photo"), {"photo": [image()]}, format="multipart")
+        photo = UserPhotos.objects.get()
+
+        feed = self.client.get(reverse("homepage")).data["results"][0]
+        detail = self.client.get(reverse("lot_detail", kwargs={"pk": self.lot.id})).data
+
+        self.assertEqual(feed["main_photo"], f"https://photos.test/{photo.thumbnail.name}")
+        self.assertEqual(detail["main_photo"], f"https://photos.test/{photo.thumbnail.name}")
+        self.assertEqual(detail["photos"], [f"https://photos.test/{photo.photo.name}"])
+
+    def test_photos_without_thumbnail_fall_back_to_the_original(self):
+        UserPhotos.objects.create(user=self.user, photo="photos/old.jpg")
+
+        feed = self.client.get(reverse("homepage")).data["results"][0]
+
+        self.assertEqual(feed["main_photo"], "https://photos.test/photos/old.jpg")
+
+    def test_non_image_upload_is_rejected(self):
+        not_an_image = SimpleUploadedFile("a.jpg", b"not an image", content_type="image/jpeg")
+
+        resp = self.client.post(reverse("upload_lot_photo"), {"photo": [not_an_image]}, format="multipart")
+
+        self.assertEqual(resp.status_code, 400)
+        self.lot.refresh_from_db()
+        self.assertEqual(self.lot.photo_count, 0)
+
+    def test_decompression_bomb_is_rejected(self):
+        # Pillow refuses images over twice MAX_IMAGE_PIXELS with DecompressionBombError
+        with patch.object(Image, "MAX_IMAGE_PIXELS", 1000):
+            lot_photo = self.client.post(reverse("upload_lot_photo"), {"photo": [image()]}, format="multipart")
+            avatar = self.client.post(reverse("upload_profile_photo"), {"photo": image()}, format="multipart")
+
+        self.assertEqual((lot_photo.status_code, avatar.status_code), (400, 400))
+        self.assertEqual(lot_photo.data["detail"], "файл не є зображенням.")
+        self.assertEqual(self.storage.files, {})
+
+    def test_generate_thumbnails_backfills_old_photos(self):
+        self.storage.files["photos/old.jpg"] = image().read()
+        old = UserPhotos.objects.create(user=self.user, photo="photos/old.jpg")
+
+        call_command("generate_thumbnails", stdout=StringIO())
+
+        old.refresh_from_db()
+        self.assertEqual(self.stored_image(old.thumbnail.name).size, PHOTO_THUMBNAIL_SIZE)
+
+    def test_profile_photo_upload_stores_an_avatar_thumbnail(self):
+        resp = self.client.post(reverse("upload_profile_photo"), {"photo": image("me.png")}, format="multipart")
+        self.assertEqual(resp.status_code, 200)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.stored_image(self.user.profile_pic_thumbnail.name).size, AVATAR_THUMBNAIL_SIZE)
+
+        Comment.objects.create(user=self.user, lot=self.lot, text="hi")
+        comment = self.client.get(reverse("lot_detail", kwargs={"pk": self.lot.id})).data["comments"][0]
+        self.assertEqual(comment["user_avatar"], f"https://photos.test/{self.user.profile_pic_thumbnail.name}")
+
+
+class StoredPhotoUrlTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="u@ukma.edu.ua", password="x")
+        self.lot = Lot.objects.create(user=self.user, last_bet=0)
+        self.client.force_authenticate(user=self.user)
+
+        self.storage = InMemoryPhotoStorage()
+        for model, field in [
+            (UserPhotos, "photo"), (UserPhotos, "thumbnail"),
+            (User, "profile_pic"), (User, "profile_pic_thumbnail"),
+        ]:
+            patcher = patch.object(model._meta.get_field(field), "storage", self.storage)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_upload_stores_absolute_urls(self):
+        self.client.post(reverse("upload_lot_photo"), {"photo": [image()]}, format="multipart")
+        self.client.post(reverse("upload_profile_photo"), {"photo": image("me.jpg")}, format="multipart")
+
+        photo = UserPhotos.objects.get()
+        self.assertEqual(photo.photo_url, f"https://photos.test/{photo.photo.name}")
+        self.assertEqual(photo.thumbnail_url, f"https://photos.test/{photo.thumbnail.name}")
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.profile_pic_thumbnail_url, f"https://photos.test/{self.user.profile_pic_thumbnail.name}")
+
+    def test_serializers_read_stored_urls_without_touching_storage(self):
+        self.client.post(reverse("upload_lot_photo"), {"photo": [image(), image()]}, format="multipart")
+        self.client.post(reverse("upload_profile_photo"), {"photo": image("me.jpg")}, format="multipart")
+        Comment.objects.create(user=self.user, lot=self.lot, text="hi")
+        photo = UserPhotos.objects.order_by("id").first()
+
+        with patch.object(self.storage, "url", side_effect=AssertionError("storage.url called")):
+            feed = self.client.get(reverse("homepage")).data["results"][0]
+            detail = self.client.get(reverse("lot_detail", kwargs={"pk": self.lot.id})).data
+            my_lot = self.client.get(reverse("my_lot")).data
+
+        self.assertEqual(feed["main_photo"], photo.thumbnail_url)
+        self.assertEqual(detail["main_photo"], photo.thumbnail_url)
+        self.assertEqual(detail["photos"][0], photo.photo_url)
+        self.assertEqual(my_lot["photos"][0]["url"], photo.photo_url)
+        self.assertEqual(detail["comments"][0]["user_avatar"], self.user.profile_pic_thumbnail_url)
+
+    def test_comment_avatars_follow_avatar_changes(self):
+        url = reverse("upload_profile_photo")
+        self.client.post(url, {"photo": image("old.jpg")}, format="multipart")
+        Comment.objects.create(user=self.user, lot=self.lot, text="hi")
+
+        self.client.post(url, {"photo": image("new.jpg")}, format="multipart")
+        self.user.refresh_from_db()
+        comment = self.client.get(reverse("lot_detail", kwargs={"pk": self.lot.id})).data["comments"][0]
+        self.assertEqual(comment["user_avatar"], self.user.profile_pic_thumbnail_url)
+
+        self.client.delete(url)
+        comment = self.client.get(reverse("lot_detail", kwargs={"pk": self.lot.id})).data["comments"][0]
+        self.assertIsNone(comment["user_avatar"])
+
+    def test_store_photo_urls_backfills_old_rows(self):
+        old = UserPhotos.objects.create(user=self.user, photo="photos/old.jpg")
+
+        call_command("store_photo_urls", stdout=StringIO())
+
+        old.refresh_from_db()
+        self.assertEqual(old.photo_url, "https://photos.test/photos/old.jpg")
+        self.assertEqual(old.thumbnail_url, "")
+
+
+class PhotoUploadTransactionTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="u@ukma.edu.ua", password="x")
+        self.lot = Lot.objects.create(user=self.user, last_bet=0)
+        self.client.force_authenticate(user=self.user)
+
+    @override_settings(PHOTO_UPLOAD_WORKERS=1)
+    def test_storage_uploads_run_outside_a_transaction(self):
+        # a transaction open here would keep the lot row locked by the slot reservation
+        in_transaction = []
+
+        def upload(storage, name, content):
+            in_transaction.append(connection.in_atomic_block)
+            return {"public_id": name}
+
+        patch_cloudinary(self)
+        with patch.object(MediaCloudinaryStorage, "_upload", upload):
+            resp = self.client.post(reverse("upload_lot_photo"), {"photo": [image(), image()]}, format="multipart")
+
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(in_transaction, [False] * 4)
+        self.lot.refresh_from_db()
+        self.assertEqual(self.lot.photo_count, 2)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class LotPhotoCapConcurrencyTests(TransactionTestCase):
+    THREADS = 5
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="u@ukma.edu.ua", password="x")
+        self.lot = Lot.objects.create(user=self.user, last_bet=0)
+        patch_cloudinary(self)
+
+    def test_parallel_uploads_never_exceed_the_cap(self):
+        barrier = threading.Barrier(self.THREADS)
+        statuses = []
+
+        def upload():
+            client = APIClient()
+            client.force_authenticate(user=self.user)
+            try:
+                barrier.wait()
+                resp = client.post(reverse("upload_lot_photo"), {"photo": [image(), image()]}, format="multipart")
+                statuses.append(resp.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=upload) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(statuses.count(201), 2)
+        self.lot.refresh_from_db()
+        self.assertEqual(self.lot.photo_count, 4)
+        self.assertEqual(UserPhotos.objects.filter(user=self.user).count(), 4)
@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from auction.models import Lot, Themes
+from auction.ratelimit import RateLimit
+from auction.serializers import CommentSerializer
+from auction.tests.test_lot_photos import image, patch_cloudinary
+
+User = get_user_model()
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.rate_limit = RateLimit("test", limit=3, window=60)
+
+    def hits(self, now, count):
+        return [self.rate_limit.hit(1, now=now) for _ in range(count)]
+
+    def test_window_slides_over_the_previous_window(self):
+        self.assertEqual(self.hits(now=6000, count=4), [True, True, True, False])
+
+        # the previous window still fully counts at the start of the next one
+        self.assertEqual(self.hits(now=6060, count=1), [False])
+        # and half of it counts halfway through
+        self.assertEqual(self.hits(now=6090, count=2), [True, False])
+        # two windows later it's forgotten
+        self.assertEqual(self.hits(now=6180, count=4), [True, True, True, False])
+
+    def test_undo_takes_back_the_counted_hit(self):
+        self.hits(now=6000, count=3)
+        self.rate_limit.undo()
+
+        self.assertEqual(self.hits(now=6000, count=2), [True, False])
+
+    def test_undo_after_the_counter_expired_is_a_no_op(self):
+        self.rate_limit.hit(1, now=6000)
+        cache.clear()
+
+        self.rate_limit.undo()
+
+    def test_limits_are_per_ident(self):
+        self.hits(now=6000, count=3)
+        self.assertTrue(self.rate_limit.hit(2, now=6000))
+
+
+class RateLimitedWritesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.owner = User.objects.create_user(email="owner@ukma.edu.ua", password="x")
+        self.user = User.objects.create_user(email="u@ukma.edu.ua", password="x")
+        self.lot = Lot.objects.create(user=self.owner, last_bet=0)
+        self.client.force_authenticate(user=self.user)
+
+    def test_comment_limit_does_not_query_comments(self):
+        with CaptureQueriesContext(connection) as ctx:
+            s = CommentSerializer(data={"user": self.user.id, "lot": self.lot.id, "text": "hi"})
+            self.assertTrue(s.is_valid(), s.errors)
+
+        self.assertFalse(any('"auction_comment"' in q["sql"] for q in ctx.captured_queries))
+
+    @override_settings(RATE_LIMITS={"comment": (1, 60)})
+    def test_comment_limit_can_be_configured(self):
+        statuses = [
+            CommentSerializer(data={"user": self.user.id, "lot": self.lot.id, "text": "hi"}).is_valid()
+            for _ in range(2)
+        ]
+
+        self.assertEqual(statuses, [True, False])
+
+    @override_settings(RATE_LIMITS={"bid": (2, 60)})
+    def test_bids_over_the_limit_get_429(self):
+        url = reverse("lot_detail", kwargs={"pk": self.lot.id})
+        # the rejected bid (below last_bet + 10) doesn't count
+        amounts = (5, 10, 20, 30)
+        statuses = [self.client.post(url, {"amount": amount}, format="json").status_code for amount in amounts]
+
+        self.assertEqual(statuses, [400, 201, 201, 429])
+        self.lot.refresh_from_db()
+        self.assertEqual(self.lot.last_bet, 20)
+
+    @override_settings(RATE_LIMITS={"complaint": (1, 60)})
+    def test_complaints_over_the_limit_get_429(self):
+        url = reverse("complaint", kwargs={"pk": Themes.objects.create(name="spam").id})
+        invalid = self.client.post(reverse("complaint", kwargs={"pk": 999}), {"text": "x"}, format="json")
+        statuses = [self.client.post(url, {"text": "x"}, format="json").status_code for _ in range(2)]
+
+        self.assertEqual([invalid.status_code, *statuses], [400, 201, 429])
+
+    @override_settings(RATE_LIMITS={"photo_upload": (1, 60)})
+    def test_photo_uploads_over_the_limit_get_429(self):
+        patch_cloudinary(self)
+        Lot.objects.create(user=self.user, last_bet=0)
+        url = reverse("upload_profile_photo")
+        not_an_image = SimpleUploadedFile("a.jpg", b"not an image", content_type="image/jpeg")
+        statuses = [self.client.post(url, {"photo": not_an_image}, format="multipart").status_code]
+        statuses += [self.client.post(url, {"photo": image()}, format="multipart").status_code for _ in range(2)]
+        statuses.append(self.client.post(reverse("upload_lot_photo"), {"photo": image()}, format="multipart").status_code)
+
+        self.assertEqual(statuses, [400, 200, 429, 429])
@@ -0,0 +1,92 @@
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from auction.models import Faculty, Major, Role
+from auction.reference import get_reference_state, invalidate_reference_data
+from user.models import Gender, Year
+
+User = get_user_model()
+
+
+class ReferenceDataTests(TestCase):
+    def setUp(self):
+        invalidate_reference_data()
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_user(email="u@ukma.edu.ua", password="x"))
+
+        self.fi = Faculty.objects.create(name="FI")
+        self.fen = Faculty.objects.create(name="FEN")
+        self.cs = Major.objects.create(name="CS", faculty=self.fi)
+        Major.objects.create(name="Economics", faculty=self.fen)
+        Role.objects.create(name="Student")
+        Year.objects.create(year="2")
+        Gender.objects.create(gender="female")
+
+    def test_repeated_requests_are_served_from_cache(self):
+        first = self.client.get(reverse("faculty-list"))
+        self.assertEqual([f["name"] for f in first.data], ["FI", "FEN"])
+
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse("faculty-list"))
+        self.assertEqual(second.data, first.data)
+
+    def test_etag_and_last_modified_return_304(self):
+        first = self.client.get(reverse("year-list"))
+        self.assertIn("ETag", first)
+        self.assertIn("Last-Modified", first)
+
+        by_etag = self.client.get(reverse("year-list"), HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(by_etag.status_code, 304)
+
+        by_date = self.client.get(reverse("year-list"), HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(by_date.status_code, 304)
+
+    def test_saving_reference_model_invalidates_cache(self):
+        first = self.client.get(reverse("role-list"))
+
+        Role.objects.create(name="Teacher")
+
+        second = self.client.get(reverse("role-list"), HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual([r["name"] for r in second.data], ["Student", "Teacher"])
+        self.assertNotEqual(second["ETag"], first["ETag"])
+
+    def test_deleting_reference_model_invalidates_cache(self):
+        self.client.get(reverse("gender-list"))
+
+        Gender.objects.all().delete()
+
+        self.assertEqual(self.client.get(reverse("gender-list")).data, [])
+
+    def test_major_list_filters_cached_majors_by_faculty(self):
+        resp = self.client.get(reverse("major-list"), {"faculty": self.fi.id})
+        self.assertEqual([m["id"] for m in resp.data], [self.cs.id])
+
+    def test_reference_endpoint_returns_all_tables(self):
+        resp = self.client.get(reverse("reference"))
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(set(resp.data), {"faculties", "majors", "roles", "years", "genders"})
+        self.assertEqual(len(resp.data["majors"]), 2)
+        self.assertEqual(resp.data["genders"][0]["gender"], "female")
+
+    def test_new_version_again_after_commit(self):
+        # a request between the save and the commit could cache the old rows under the first new version
+        with self.captureOnCommitCallbacks(execute=True):
+            Role.objects.create(name="Teacher")
+            before_commit = get_reference_state()["version"]
+
+        self.assertNotEqual(get_reference_state()["version"], before_commit)
+
+    @override_settings(REFERENCE_LOCAL_STATE_TIMEOUT=60)
+    def test_local_memory_version_expires(self):
+        # other processes can't see an invalidation in this process's local-memory cache
+        version = get_reference_state()["version"]
+
+        with patch("django.core.cache.backends.locmem.time.time", return_value=time.time() + 61):
+            self.assertNotEqual(get_reference_state()["version"], version)
@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from auction.models import Lot
+
+User = get_user_model()
+
+
+class LotSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.viewer = User.objects.create_user(email="viewer@ukma.edu.ua", password="x")
+        self.client.force_authenticate(user=self.viewer)
+
+        self.anna = User.objects.create_user(email="a@ukma.edu.ua", password="x", first_name="Anna", last_name="Koval")
+        self.petro = User.objects.create_user(email="p@ukma.edu.ua", password="x", first_name="Petro", last_name="Shevchenko")
+        self.anna_lot = Lot.objects.create(user=self.anna, description="Loves hiking and jazz")
+        self.petro_lot = Lot.objects.create(user=self.petro, display_first_name="Mysterious", display_last_name="Stranger")
+
+    def search(self, term):
+        resp = self.client.get(reverse("homepage"), {"search": term})
+        self.assertEqual(resp.status_code, 200)
+        return [lot["id"] for lot in resp.data["results"]]
+
+    def test_matches_real_names(self):
+        self.assertEqual(self.search("koval"), [self.anna_lot.id])
+
+    def test_matches_display_names(self):
+        self.assertEqual(self.search("Stranger"), [self.petro_lot.id])
+
+    def test_matches_description(self):
+        self.assertEqual(self.search("jazz"), [self.anna_lot.id])
+
+    def test_search_document_follows_user_rename(self):
+        self.anna.last_name = "Bondar"
+        self.anna.save()
+
+        self.assertEqual(self.search("Bondar"), [self.anna_lot.id])
+        self.assertEqual(self.search("Koval"), [])
+
+    def test_search_document_follows_lot_edit(self):
+        self.petro_lot.description = "Plays chess"
+        self.petro_lot.save(update_fields=["description"])
+
+        self.assertEqual(self.search("chess"), [self.petro_lot.id])
@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from rest_framework.exceptions import ValidationError
@@ -39,6 +40,7 @@ class CommentSerializerTests(TestCase):
         self.other_lot = Lot.objects.create(user=self.other, last_bet=0)
 
         self.bid_on_other_lot = Bid.objects.create(user=self.other, lot=self.other_lot, amount=10)
+        cache.clear()
 
     def test_comment_requires_text_or_bid(self):
         s = CommentSerializer(data={"user": self.user.id, "lot": self.lot.id})
@@ -68,9 +70,10 @@ class CommentSerializerTests(TestCase):
         self.assertIn("non_field_errors", s.errors)
 
     def test_comment_antispam_rate_limit(self):
-        # ANTI_SPAM_MAX = 5 per 1 minute
+        # ANTI_SPAM_MAX = 5 per 1 minute, counted in the cache rather than the comments table
         for i in range(5):
-            Comment.objects.create(user=self.user, lot=self.lot, text=f"c{i}")
+            s = CommentSerializer(data={"user": self.user.id, "lot": self.lot.id, "text": f"c{i}"})
+            self.assertTrue(s.is_valid(), s.errors)
 
         s = CommentSerializer(data={"user": self.user.id, "lot": self.lot.id, "text": "one more"})
         self.assertFalse(s.is_valid())
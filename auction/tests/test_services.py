@@ -0,0 +1,86 @@
+import random
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from rest_framework.exceptions import ValidationError
+
+from auction.models import Lot, Bid
+from auction.services import place_bid
+
+User = get_user_model()
+
+
+class PlaceBidTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email="owner@ukma.edu.ua", password="x")
+        self.bidder = User.objects.create_user(email="u@ukma.edu.ua", password="x")
+        self.lot = Lot.objects.create(user=self.owner, last_bet=0)
+
+    def test_place_bid_updates_last_bet_and_returns_previous_bid(self):
+        first, previous = place_bid(self.bidder, self.lot.id, 10)
+        self.assertIsNone(previous)
+
+        second, previous = place_bid(self.bidder, self.lot.id, 20)
+        self.assertEqual(previous, first)
+
+        self.lot.refresh_from_db()
+        self.assertEqual(self.lot.last_bet, 20)
+        first.refresh_from_db()
+        self.assertTrue(first.is_overbid)
+        self.assertFalse(second.is_overbid)
+
+    def test_place_bid_validates_against_current_row_not_stale_copy(self):
+        stale_lot = Lot.objects.get(pk=self.lot.pk)
+        Lot.objects.filter(pk=self.lot.pk).update(last_bet=100)
+
+        with self.assertRaises(ValidationError):
+            place_bid(self.bidder, stale_lot.id, 50)
+
+        self.assertFalse(Bid.objects.filter(lot=self.lot).exists())
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class PlaceBidConcurrencyTests(TransactionTestCase):
+    THREADS = 20
+
+    def setUp(self):
+        self.owner = User.objects.create_user(email="owner@ukma.edu.ua", password="x")
+        self.bidders = [
+            User.objects.create_user(email=f"bidder{i}@ukma.edu.ua", password="x")
+            for i in range(self.THREADS)
+        ]
+        self.lot = Lot.objects.create(user=self.owner, last_bet=0)
+
+    def test_parallel_bids_keep_last_bet_monotonic(self):
+        amounts = [10 * (i // 2 + 1) for i in range(self.THREADS)]
+        random.shuffle(amounts)
+        barrier = threading.Barrier(self.THREADS)
+
+        def bid(user, amount):
+            try:
+                barrier.wait()
+                place_bid(user, self.lot.id, amount)
+            except ValidationError:
+                pass
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=bid, args=(user, amount))
+            for user, amount in zip(self.bidders, amounts)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        accepted = list(Bid.objects.filter(lot=self.lot).order_by('id').values_list('amount', flat=True))
+        self.assertTrue(accepted)
+        for lower, higher in zip(accepted, accepted[1:]):
+            self.assertGreaterEqual(higher, lower + 10)
+
+        self.lot.refresh_from_db()
+        self.assertEqual(self.lot.last_bet, accepted[-1])
+        self.assertEqual(Bid.objects.filter(lot=self.lot, is_overbid=False).count(), 1)
@@ -2,15 +2,24 @@ from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import ExpressionWrapper, F, FloatField
+from django.test.utils import CaptureQueriesContext
 from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+from cloudinary_storage.storage import MediaCloudinaryStorage
 
-from auction.models import Lot, Bid, Comment
+from auction.feed import FEED_SORTS
+from auction.models import Lot, Bid, Comment, Faculty, Major, Role
+from user.models import Gender, Year, UserPhotos
 
 User = get_user_model()
 
 
 class AuctionFunctionalTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = User.objects.create_user(email="u@ukma.edu.ua", password="x", first_name="A", last_name="B")
         self.other = User.objects.create_user(email="v@ukma.edu.ua", password="x", first_name="C", last_name="D")
@@ -76,7 +85,7 @@ class AuctionFunctionalTests(TestCase):
         self.auth(self.other)  
         url = reverse("lot_detail", kwargs={"pk": lot.id})
 
-        with patch("auction.views.notification_service.notify_bid_overbid_sync") as notify_mock:
+        with patch("auction.views.notification_service.enqueue_bid_overbid") as notify_mock:
             resp = self.client.post(url, data={"amount": 20, "text": "my bid"}, format="json")
 
         self.assertEqual(resp.status_code, 201)
@@ -110,3 +119,423 @@ class AuctionFunctionalTests(TestCase):
 
         self.assertEqual(resp.status_code, 201)
         self.assertTrue(Comment.objects.filter(lot=lot, user=self.user, text="hello").exists())
+
+
+class HomePageQueryCountTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.viewer = User.objects.create_user(email="viewer@ukma.edu.ua", password="x")
+        self.client.force_authenticate(user=self.viewer)
+
+        faculty = Faculty.objects.create(name="FI")
+        self.profile = {
+            "faculty": faculty,
+            "major": Major.objects.create(name="CS", faculty=faculty),
+            "year": Year.objects.create(year="2"),
+            "gender": Gender.objects.create(gender="female"),
+            "role": Role.objects.create(name="Student"),
+        }
+        self.lots_created = 0
+
+        url_patcher = patch.object(MediaCloudinaryStorage, "url", lambda storage, name: f"https://cdn.test/{name}")
+        url_patcher.start()
+        self.addCleanup(url_patcher.stop)
+
+    def create_lots(self, count):
+        for _ in range(count):
+            self.lots_created += 1
+            owner = User.objects.create_user(
+                email=f"owner{self.lots_created}@ukma.edu.ua", password="x", profile_pic="profile_pic/p.jpg",
+                **self.profile
+            )
+            lot = Lot.objects.create(user=owner, last_bet=10)
+            UserPhotos.objects.create(user=owner, photo="photos/a.jpg")
+            UserPhotos.objects.create(user=owner, photo="photos/b.jpg")
+            bid = Bid.objects.create(user=self.viewer, lot=lot, amount=10)
+            Comment.objects.create(user=self.viewer, lot=lot, text="hi", bid=bid)
+            Comment.objects.create(user=owner, lot=lot, text="thanks")
+
+    def count_feed_queries(self, page_size):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse("homepage"), {"page_size": page_size})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.data["results"]), page_size)
+        return len(ctx.captured_queries)
+
+    def test_feed_query_count_does_not_grow_with_page_size(self):
+        self.create_lots(2)
+        small_page = self.count_feed_queries(page_size=2)
+
+        self.create_lots(10)
+        full_page = self.count_feed_queries(page_size=12)
+
+        self.assertEqual(small_page, full_page)
+
+    def test_feed_returns_compact_lots_without_comment_threads(self):
+        self.create_lots(1)
+        resp = self.client.get(reverse("homepage"))
+
+        lot_data = resp.data["results"][0]
+        self.assertEqual(lot_data["faculty"], "FI")
+        self.assertEqual(lot_data["main_photo"], "https://cdn.test/photos/a.jpg")
+        self.assertEqual(lot_data["comment_count"], 2)
+        self.assertEqual(lot_data["latest_bid"]["amount"], 10)
+        self.assertNotIn("comments", lot_data)
+        self.assertNotIn("photos", lot_data)
+
+    def test_filtered_feed_reads_lots_without_joins(self):
+        self.create_lots(3)
+        params = {
+            "faculty": self.profile["faculty"].id,
+            "gender": self.profile["gender"].id,
+            "year": self.profile["year"].id,
+            "role": self.profile["role"].id,
+        }
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse("homepage"), params)
+
+        self.assertEqual(resp.data["count"], 3)
+        self.assertEqual(resp.data["results"][0]["faculty"], "FI")
+        lot_queries = [q["sql"] for q in ctx.captured_queries if '"auction_lot"' in q["sql"]]
+        self.assertTrue(lot_queries)
+        for sql in lot_queries:
+            self.assertNotIn("JOIN", sql)
+
+    def test_lot_detail_serializes_photos_and_comments_from_prefetch(self):
+        self.create_lots(1)
+        lot = Lot.objects.get()
+
+        with self.assertNumQueries(3):
+            resp = self.client.get(reverse("lot_detail", kwargs={"pk": lot.id}))
+
+        self.assertEqual(len(resp.data["photos"]), 2)
+        self.assertEqual([c["bid"] for c in resp.data["comments"]], [10, None])
+
+
+class FeedCursorPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.viewer = User.objects.create_user(email="viewer@ukma.edu.ua", password="x")
+        self.client.force_authenticate(user=self.viewer)
+        for i in range(7):
+            owner = User.objects.create_user(email=f"owner{i}@ukma.edu.ua", password="x")
+            # repeated prices so the id tie-breaker matters
+            Lot.objects.create(user=owner, last_bet=(i % 3) * 10)
+
+    def walk(self, params):
+        seen = []
+        resp = self.client.get(reverse("homepage"), {"pagination": "cursor", "page_size": 2, **params})
+        while True:
+            self.assertEqual(resp.status_code, 200)
+            self.assertNotIn("count", resp.data)
+            seen.extend(lot["id"] for lot in resp.data["results"])
+            if not resp.data["next"]:
+                return seen
+            resp = self.client.get(resp.data["next"])
+
+    def test_walks_every_sort_in_order(self):
+        for sort, ordering in FEED_SORTS.items():
+            with self.subTest(sort=sort):
+                expected = list(Lot.objects.order_by(*ordering).values_list("id", flat=True))
+                self.assertEqual(self.walk({"sort": sort}), expected)
+
+    def test_default_sort_is_newest_first(self):
+        expected = list(Lot.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        self.assertEqual(self.walk({}), expected)
+
+    def test_page_runs_no_count_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse("homepage"), {"pagination": "cursor", "sort": "price_asc"})
+
+        self.assertEqual(len(resp.data["results"]), 7)
+        # the page itself and nothing else: no COUNT(*) over the filtered feed
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_walks_ranked_search_results(self):
+        # SQLite never ranks, so stand in for the PostgreSQL search with a rank that has ties
+        def ranked_search(lots, term):
+            rank = ExpressionWrapper(F("last_bet") / 10.0, output_field=FloatField())
+            return lots.annotate(search_rank=rank), True
+
+        with patch("auction.feed.search_lots", ranked_search):
+            seen = self.walk({"search": "x"})
+
+        expected = Lot.objects.annotate(search_rank=F("last_bet")).order_by("-search_rank", "-created_at", "-id")
+        self.assertEqual(seen, list(expected.values_list("id", flat=True)))
+
+    def test_cursor_from_another_sort_returns_404(self):
+        resp = self.client.get(reverse("homepage"), {"pagination": "cursor", "sort": "created_at_desc", "page_size": 2})
+        cursor = parse_qs(urlparse(resp.data["next"]).query)["cursor"][0]
+
+        resp = self.client.get(reverse("homepage"), {"pagination": "cursor", "sort": "price_asc", "cursor": cursor})
+        self.assertEqual(resp.status_code, 404)
+
+
+class LotCommentsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="u@ukma.edu.ua", password="x", first_name="A", last_name="B")
+        self.lot = Lot.objects.create(user=self.user, last_bet=0)
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("lot_comments", kwargs={"pk": self.lot.id})
+
+    def test_pages_through_top_level_comments_with_cursor(self):
+        top_level = [Comment.objects.create(user=self.user, lot=self.lot, text=f"c{i}") for i in range(5)]
+
+        seen = []
+        resp = self.client.get(self.url, {"page_size": 2})
+        while True:
+            self.assertEqual(resp.status_code, 200)
+            seen.extend(c["id"] for c in resp.data["results"])
+            if not resp.data["next"]:
+                break
+            resp = self.client.get(resp.data["next"])
+
+        self.assertEqual(seen, [c.id for c in top_level])
+
+    def test_replies_are_grouped_under_their_parent(self):
+        parent = Comment.objects.create(user=self.user, lot=self.lot, text="parent")
+        reply = Comment.objects.create(user=self.user, lot=self.lot, text="reply", parent=parent)
+        Comment.objects.create(user=self.user, lot=self.lot, text="other")
+
+        resp = self.client.get(self.url)
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.data["results"]), 2)
+        self.assertEqual([r["id"] for r in resp.data["results"][0]["replies"]], [reply.id])
+        self.assertEqual(resp.data["results"][1]["replies"], [])
+
+    def test_page_query_count_does_not_grow_with_thread_length(self):
+        for i in range(30):
+            parent = Comment.objects.create(user=self.user, lot=self.lot, text=f"c{i}")
+            Comment.objects.create(user=self.user, lot=self.lot, text="reply", parent=parent)
+
+        with self.assertNumQueries(3):
+            resp = self.client.get(self.url, {"page_size": 10})
+
+        self.assertEqual(len(resp.data["results"]), 10)
+        self.assertIsNotNone(resp.data["next"])
+
+    def test_thread_renders_from_comment_rows_alone(self):
+        other = User.objects.create_user(email="v@ukma.edu.ua", password="x", first_name="C", last_name="D")
+        parent = Comment.objects.create(user=other, lot=self.lot, text="parent")
+        Comment.objects.create(user=self.user, lot=self.lot, text="reply", parent=parent)
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(self.url)
+
+        self.assertEqual(resp.data["results"][0]["user_name"], "C D")
+        self.assertEqual(resp.data["results"][0]["replies"][0]["user_name"], "A B")
+        self.assertFalse(any('"user_customuser"' in q["sql"] for q in ctx.captured_queries))
+
+    def test_bid_comments_cost_constant_queries(self):
+        def add_bid_comments(count):
+            for _ in range(count):
+                amount = self.lot.last_bet + 10
+                bid = Bid.objects.create(user=self.user, lot=self.lot, amount=amount)
+                Lot.objects.filter(pk=self.lot.pk).update(last_bet=amount)
+                self.lot.last_bet = amount
+                Comment.objects.create(user=self.user, lot=self.lot, text="bid", bid=bid)
+
+        def count_queries(url):
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.get(url, {"page_size": 100})
+            self.assertEqual(resp.status_code, 200)
+            # amounts come from the comment rows
+            self.assertFalse(any('"auction_bid"' in q["sql"] for q in ctx.captured_queries))
+            return len(ctx.captured_queries), resp
+
+        detail_url = reverse("lot_detail", kwargs={"pk": self.lot.id})
+        add_bid_comments(2)
+        few = count_queries(self.url)[0], count_queries(detail_url)[0]
+
+        add_bid_comments(10)
+        thread_queries, thread = count_queries(self.url)
+        detail_queries, detail = count_queries(detail_url)
+
+        self.assertEqual((thread_queries, detail_queries), few)
+        self.assertEqual([c["bid"] for c in thread.data["results"]], [10 * i for i in range(1, 13)])
+        self.assertEqual([c["bid"] for c in detail.data["comments"]], [10 * i for i in range(1, 13)])
+
+    def test_author_snapshot_is_kept_after_rename(self):
+        Comment.objects.create(user=self.user, lot=self.lot, text="hi")
+        self.user.first_name = "Renamed"
+        self.user.save()
+
+        resp = self.client.get(self.url)
+
+        self.assertEqual(resp.data["results"][0]["user_name"], "A B")
+
+    def test_reply_to_a_reply_is_prefixed_with_the_author_snapshot(self):
+        other = User.objects.create_user(email="v@ukma.edu.ua", password="x", first_name="C", last_name="D")
+        parent = Comment.objects.create(user=self.user, lot=self.lot, text="parent")
+        reply = Comment.objects.create(user=other, lot=self.lot, text="reply", parent=parent)
+
+        resp = self.client.post(
+            reverse("lot_detail", kwargs={"pk": self.lot.id}), {"text": "hello", "parent": reply.id}, format="json"
+        )
+
+        self.assertEqual(resp.status_code, 201)
+        answer = Comment.objects.latest("id")
+        self.assertEqual(answer.parent_id, parent.id)
+        self.assertEqual(answer.text, "@C D: hello")
+
+    def test_invalid_cursor_returns_404(self):
+        resp = self.client.get(self.url, {"cursor": "not-a-cursor"})
+        self.assertEqual(resp.status_code, 404)
+
+    def test_missing_lot_returns_404(self):
+        resp = self.client.get(reverse("lot_comments", kwargs={"pk": self.lot.id + 100}))
+        self.assertEqual(resp.status_code, 404)
+
+
+class LotBidsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.owner = User.objects.create_user(email="owner@ukma.edu.ua", password="x")
+        self.first = User.objects.create_user(email="a@ukma.edu.ua", password="x", first_name="A", last_name="B")
+        self.second = User.objects.create_user(email="c@ukma.edu.ua", password="x", first_name="C", last_name="D")
+        self.lot = Lot.objects.create(user=self.owner, last_bet=0)
+        self.client.force_authenticate(user=self.first)
+        self.url = reverse("lot_bids", kwargs={"pk": self.lot.id})
+
+    def bid(self, user, amount):
+        self.client.force_authenticate(user=user)
+        resp = self.client.post(reverse("lot_detail", kwargs={"pk": self.lot.id}), {"amount": amount}, format="json")
+        self.assertEqual(resp.status_code, 201)
+
+    def test_stats_are_kept_on_bid_insert(self):
+        self.bid(self.first, 10)
+        self.bid(self.second, 20)
+        self.bid(self.first, 30)
+
+        self.lot.refresh_from_db()
+        self.assertEqual((self.lot.bid_count, self.lot.bidder_count), (3, 2))
+        self.assertEqual(self.lot.last_bid_at, Bid.objects.latest("id").created_at)
+
+        resp = self.client.get(self.url)
+
+        self.assertEqual(resp.status_code, 200)
+        stats = resp.data["stats"]
+        self.assertEqual((stats["bid_count"], stats["unique_bidders"], stats["max_bid"]), (3, 2, 30))
+        self.assertIsNotNone(stats["last_bid_at"])
+
+    def test_stats_survive_saves_of_a_lot_loaded_before_the_bid(self):
+        stale = Lot.objects.get(pk=self.lot.pk)
+        self.bid(self.first, 10)
+
+        stale.description = "edited"
+        stale.save()
+
+        self.lot.refresh_from_db()
+        self.assertEqual((self.lot.bid_count, self.lot.bidder_count), (1, 1))
+        self.assertEqual(self.lot.last_bid_at, Bid.objects.get().created_at)
+
+    def test_pages_through_bids_newest_first(self):
+        for i in range(1, 6):
+            self.bid(self.first if i % 2 else self.second, 10 * i)
+
+        seen = []
+        resp = self.client.get(self.url, {"page_size": 2})
+        while True:
+            seen.extend((b["amount"], b["user_name"]) for b in resp.data["results"])
+            if not resp.data["next"]:
+                break
+            resp = self.client.get(resp.data["next"])
+
+        self.assertEqual(seen, [(50, "A B"), (40, "C D"), (30, "A B"), (20, "C D"), (10, "A B")])
+
+    def test_page_query_count_does_not_grow_with_history(self):
+        for i in range(1, 31):
+            self.bid(self.first if i % 2 else self.second, 10 * i)
+
+        with self.assertNumQueries(2):
+            resp = self.client.get(self.url, {"page_size": 25})
+
+        self.assertEqual(len(resp.data["results"]), 25)
+        self.assertEqual(resp.data["stats"]["bid_count"], 30)
+
+    def test_lot_without_bids(self):
+        resp = self.client.get(self.url)
+
+        self.assertEqual(resp.data["results"], [])
+        self.assertEqual(resp.data["stats"], {
+            "bid_count": 0, "unique_bidders": 0, "max_bid": None, "last_bid_at": None,
+        })
+
+    def test_missing_lot_returns_404(self):
+        resp = self.client.get(reverse("lot_bids", kwargs={"pk": self.lot.id + 100}))
+        self.assertEqual(resp.status_code, 404)
+
+
+class MyBidsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.bidder = User.objects.create_user(email="b@ukma.edu.ua", password="x")
+        self.rival = User.objects.create_user(email="r@ukma.edu.ua", password="x")
+        self.lots = []
+        for i in range(3):
+            owner = User.objects.create_user(
+                email=f"owner{i}@ukma.edu.ua", password="x", first_name=f"Owner{i}", last_name="L"
+            )
+            self.lots.append(Lot.objects.create(user=owner, last_bet=0))
+        self.url = reverse("my_bids")
+
+    def bid(self, user, lot, amount):
+        self.client.force_authenticate(user=user)
+        resp = self.client.post(reverse("lot_detail", kwargs={"pk": lot.id}), {"amount": amount}, format="json")
+        self.assertEqual(resp.status_code, 201)
+
+    def test_lists_latest_bid_per_lot_with_status_counts(self):
+        first, second, third = self.lots
+        self.bid(self.bidder, first, 10)
+        self.bid(self.bidder, first, 20)
+        self.bid(self.bidder, second, 10)
+        self.bid(self.rival, second, 30)
+        self.bid(self.bidder, third, 10)
+
+        self.client.force_authenticate(user=self.bidder)
+        resp = self.client.get(self.url)
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["counts"], {"all": 3, "active": 2, "overbid": 1})
+        results = [(b["lot"], b["amount"], b["is_overbid"]) for b in resp.data["results"]]
+        self.assertEqual(results, [(third.id, 10, False), (second.id, 10, True), (first.id, 20, False)])
+        self.assertEqual(resp.data["results"][1]["lot_info"]["current_bet"], 30)
+        self.assertEqual(resp.data["results"][2]["lot_info"]["first_name"], "Owner0")
+
+        resp = self.client.get(self.url, {"status": "overbid"})
+        self.assertEqual([b["lot"] for b in resp.data["results"]], [second.id])
+        self.assertEqual(resp.data["counts"]["all"], 3)
+
+    def test_outbid_user_becomes_active_again_after_rebidding(self):
+        lot = self.lots[0]
+        self.bid(self.bidder, lot, 10)
+        self.bid(self.rival, lot, 20)
+        self.bid(self.bidder, lot, 30)
+
+        self.client.force_authenticate(user=self.rival)
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.data["counts"], {"all": 1, "active": 0, "overbid": 1})
+
+        self.client.force_authenticate(user=self.bidder)
+        resp = self.client.get(self.url, {"status": "active"})
+        self.assertEqual([b["amount"] for b in resp.data["results"]], [30])
+
+    def test_page_query_count_does_not_grow_with_bid_history(self):
+        for lot in self.lots:
+            for amount in range(10, 60, 10):
+                self.bid(self.bidder, lot, amount)
+
+        self.client.force_authenticate(user=self.bidder)
+        with self.assertNumQueries(2):
+            resp = self.client.get(self.url, {"page_size": 2})
+
+        self.assertEqual(len(resp.data["results"]), 2)
+        resp = self.client.get(resp.data["next"])
+        self.assertEqual([b["lot"] for b in resp.data["results"]], [self.lots[0].id])
+        self.assertIsNone(resp.data["next"])
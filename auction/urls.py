@@ -7,6 +7,9 @@ urlpatterns = [
     path('mylot/', views.MyLot.as_view(), name='my_lot'),
     path('mylot/upload-photo/', views.UploadLotPhoto.as_view(), name='upload_lot_photo'),
     path('lots/<int:pk>/', views.LotDetail.as_view(), name='lot_detail'),
+    path('lots/<int:pk>/comments/', views.LotComments.as_view(), name='lot_comments'),
+    path('lots/<int:pk>/bids/', views.LotBids.as_view(), name='lot_bids'),
+    path('lots/<int:pk>/events/', views.LotEvents.as_view(), name='lot_events'),
     path('contacts/', views.Feedback.as_view(), name='feedback'),
     path('profile/', views.Profile.as_view(), name='profile'),
     path('profile/upload-photo/', views.UploadProfilePhoto.as_view(), name='upload_profile_photo'),
@@ -19,4 +22,5 @@ urlpatterns = [
     path('roles/', views.RoleList.as_view(), name='role-list'),
     path('years/', views.YearList.as_view(), name='year-list'),
     path('genders/', views.GenderList.as_view(), name='gender-list'),
+    path('reference/', views.ReferenceData.as_view(), name='reference'),
 ]
@@ -1,17 +1,32 @@
-from django.db.models import Q, Max
-from django.http import Http404
+import asyncio
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.http import Http404, StreamingHttpResponse
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.pagination import PageNumberPagination
 
-from auction.models import Lot, Complaints, Faculty, Major, Role, Bid, Comment
-from auction.serializers import LotSerializer, BidSerializer, CommentSerializer, ComplaintsSerializer, \
-    FacultySerializer, MajorSerializer, RoleSerializer, MyLotSerializer
+from auction.events import get_broker, publish_bid, publish_comment
+from auction.models import Lot, Complaints, Bid, Comment, UserLotPosition
+from auction.pagination import LotPagination, FeedCursorPagination, CommentThreadPagination, \
+    BidHistoryPagination, MyBidsPagination
+from auction.reference import REFERENCE_SOURCES, get_reference_state, get_reference_data, \
+    conditional_reference_response
+from auction.feed import filter_feed
+from auction.ratelimit import get_rate_limit
+from auction.services import place_bid
+from auction.serializers import LotSerializer, LotFeedSerializer, CommentSerializer, ComplaintsSerializer, \
+    MyLotSerializer, CommentWithRepliesSerializer, BidHistorySerializer, LotBidStatsSerializer
 from notifications.services import notification_service
-from user.models import UserPhotos
+from user.models import CustomUser, UserPhotos
 from user.serializers import CustomUserSerializer
+from user.storage import delete_files, store_files, upload_url
+from user.thumbnails import make_thumbnail, INVALID_IMAGE_ERRORS, PHOTO_THUMBNAIL_SIZE, AVATAR_THUMBNAIL_SIZE
 from user.permissions import NotBanned
 
 
@@ -22,61 +37,24 @@ class NotBannedMixin:
         return [IsAuthenticated()]
 
 
-class LotPagination(PageNumberPagination):
-    page_size = 12                       
-    page_size_query_param = "page_size"  
-    max_page_size = 100  
-
-
 class HomePage(APIView):
     def get(self, request):
-        lots = Lot.objects.all().order_by("-created_at")
+        lots = filter_feed(request.query_params)
 
-        search_query = request.query_params.get('search')
-        if search_query:
-            lots = lots.filter(
-                Q(user__first_name__icontains=search_query) |
-                Q(user__last_name__icontains=search_query)
-            )
-
-        faculty = request.query_params.get('faculty')
-        gender = request.query_params.get('gender')
-        year = request.query_params.get('year')
-        has_photo = request.query_params.get('has_photo')
-        role = request.query_params.get('role')
-
-        if faculty:
-            lots = lots.filter(user__faculty_id=faculty)
-        if gender:
-            lots = lots.filter(user__gender=gender)
-        if year:
-            lots = lots.filter(user__year=year)
-        if role:
-            lots = lots.filter(user__role=role)
-        if has_photo == 'true':
-            lots = lots.exclude(user__photo='')
-
-        sort_param = request.query_params.get('sort')
-        if sort_param == 'price_asc':
-            lots = lots.order_by('last_bet')
-        elif sort_param == 'price_desc':
-            lots = lots.order_by('-last_bet')
-        elif sort_param == 'created_at_asc':
-            lots = lots.order_by('created_at')
-        elif sort_param == 'created_at_desc':
-            lots = lots.order_by('-created_at')
-
-        paginator = LotPagination()
+        if request.query_params.get('pagination') == 'cursor':
+            paginator = FeedCursorPagination()
+        else:
+            paginator = LotPagination()
         page_qs = paginator.paginate_queryset(lots, request, view=self)
 
-        serializer = LotSerializer(page_qs, many=True)
+        serializer = LotFeedSerializer(page_qs, many=True)
         return paginator.get_paginated_response(serializer.data)
 
 
 class MyLot(NotBannedMixin, APIView):
     def get(self, request):
         user = request.user
-        my_lot = Lot.objects.filter(user=user).first()
+        my_lot = Lot.objects.with_relations().filter(user=user).first()
 
         if not my_lot:
             return Response(status=status.HTTP_404_NOT_FOUND)
@@ -115,8 +93,7 @@ class MyLot(NotBannedMixin, APIView):
                     parent_comment = Comment.objects.get(id=parent_id, lot=my_lot)
                     if parent_comment.parent_id is not None:
                         actual_parent_id = parent_comment.parent_id
-                        replied_to_user = parent_comment.user
-                        text = f"@{replied_to_user.first_name} {replied_to_user.last_name}: {text}"
+                        text = f"@{parent_comment.author_name}: {text}"
                     else:
                         actual_parent_id = parent_id
                 except Comment.DoesNotExist:
@@ -136,7 +113,7 @@ class MyLot(NotBannedMixin, APIView):
 
             comment_serializer = CommentSerializer(data=comment_data)
             comment_serializer.is_valid(raise_exception=True)
-            comment_serializer.save()
+            publish_comment(comment_serializer.save())
 
             return Response(
                 {"detail": "коментар успішно додано."},
@@ -205,8 +182,6 @@ class UploadLotPhoto(NotBannedMixin, APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        current_photos_count = UserPhotos.objects.filter(user=user).count()
-
         photos = request.FILES.getlist('photo')
 
         if not photos:
@@ -215,22 +190,69 @@ class UploadLotPhoto(NotBannedMixin, APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if current_photos_count + len(photos) > 5:
+        rate_limit = get_rate_limit('photo_upload')
+        if not rate_limit.hit(user.pk):
+            return Response(
+                {"detail": "забагато завантажень, спробуйте пізніше."},
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+
+        try:
+            thumbnails = [make_thumbnail(photo, PHOTO_THUMBNAIL_SIZE) for photo in photos]
+        except INVALID_IMAGE_ERRORS:
+            # only uploads that pass validation count towards the limit
+            rate_limit.undo()
+            return Response(
+                {"detail": "файл не є зображенням."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # reserve the slots first: the conditional update locks the lot row, so concurrent uploads
+        # can't both pass the cap. It commits on its own, so the uploads below don't hold the lock
+        # (bids on the lot and Lot.save() would wait for them).
+        reserved = Lot.objects.filter(
+            pk=my_lot.pk, photo_count__lte=Lot.MAX_PHOTOS - len(photos)
+        ).update(photo_count=F('photo_count') + len(photos))
+        my_lot.refresh_from_db(fields=['photo_count'])
+
+        if not reserved:
+            rate_limit.undo()
             return Response(
-                {"detail": f"Максимум 5 фото. У вас вже {current_photos_count} фото."},
+                {"detail": f"Максимум {Lot.MAX_PHOTOS} фото. У вас вже {my_lot.photo_count} фото."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        uploaded_urls = []
-        for photo in photos:
-            user_photo = UserPhotos.objects.create(user=user, photo=photo)
-            uploaded_urls.append(request.build_absolute_uri(user_photo.photo.url))
+        photo_field = UserPhotos._meta.get_field('photo')
+        thumbnail_field = UserPhotos._meta.get_field('thumbnail')
+        uploads = [(photo_field, photo) for photo in photos] + [(thumbnail_field, thumbnail) for thumbnail in thumbnails]
+        try:
+            names = store_files(uploads)
+        except Exception:
+            Lot.objects.filter(pk=my_lot.pk).update(photo_count=F('photo_count') - len(photos))
+            raise
+
+        try:
+            user_photos = UserPhotos.objects.bulk_create([
+                UserPhotos(
+                    user=user,
+                    photo=photo_name,
+                    photo_url=upload_url(photo_field, photo_name, request),
+                    thumbnail=thumbnail_name,
+                    thumbnail_url=upload_url(thumbnail_field, thumbnail_name, request),
+                )
+                for photo_name, thumbnail_name in zip(names[:len(photos)], names[len(photos):])
+            ])
+        except Exception:
+            delete_files(zip([field for field, _ in uploads], names))
+            Lot.objects.filter(pk=my_lot.pk).update(photo_count=F('photo_count') - len(photos))
+            raise
+        uploaded_urls = [user_photo.photo_url for user_photo in user_photos]
 
         return Response(
             {
                 "detail": f"успішно завантажено {len(photos)} фото.",
                 "photos": uploaded_urls,
-                "total_photos": current_photos_count + len(photos)
+                "total_photos": my_lot.photo_count
             },
             status=status.HTTP_201_CREATED
         )
@@ -248,7 +270,9 @@ class UploadLotPhoto(NotBannedMixin, APIView):
 
         try:
             photo = UserPhotos.objects.get(id=photo_id, user=user)
-            photo.delete()
+            with transaction.atomic():
+                photo.delete()
+                Lot.objects.filter(user=user, photo_count__gt=0).update(photo_count=F('photo_count') - 1)
             return Response(
                 {"detail": "фото успішно видалено."},
                 status=status.HTTP_204_NO_CONTENT
@@ -271,16 +295,44 @@ class UploadProfilePhoto(NotBannedMixin, APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if user.profile_pic:
-            user.profile_pic.delete(save=False)
+        rate_limit = get_rate_limit('photo_upload')
+        if not rate_limit.hit(user.pk):
+            return Response(
+                {"detail": "забагато завантажень, спробуйте пізніше."},
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
 
-        user.profile_pic = photo
-        user.save()
+        try:
+            thumbnail = make_thumbnail(photo, AVATAR_THUMBNAIL_SIZE)
+        except INVALID_IMAGE_ERRORS:
+            rate_limit.undo()
+            return Response(
+                {"detail": "файл не є зображенням."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        pic_field = CustomUser._meta.get_field('profile_pic')
+        thumbnail_field = CustomUser._meta.get_field('profile_pic_thumbnail')
+        replaced = [(pic_field, user.profile_pic.name), (thumbnail_field, user.profile_pic_thumbnail.name)]
+
+        names = store_files([(pic_field, photo), (thumbnail_field, thumbnail)])
+        user.profile_pic, user.profile_pic_thumbnail = names
+        user.profile_pic_url = upload_url(pic_field, user.profile_pic.name, request)
+        user.profile_pic_thumbnail_url = upload_url(thumbnail_field, user.profile_pic_thumbnail.name, request)
+        try:
+            user.save()
+        except Exception:
+            delete_files(zip([pic_field, thumbnail_field], names))
+            raise
+
+        Comment.update_author_avatar(user)
+        # the old avatar goes only once the new one is saved
+        delete_files((field, name) for field, name in replaced if name)
 
         return Response(
             {
                 "detail": "аватарка успішно оновлена.",
-                "photo_url": request.build_absolute_uri(user.profile_pic.url)
+                "photo_url": user.profile_pic_url
             },
             status=status.HTTP_200_OK
         )
@@ -296,7 +348,12 @@ class UploadProfilePhoto(NotBannedMixin, APIView):
 
         user.profile_pic.delete(save=False)
         user.profile_pic = None
+        if user.profile_pic_thumbnail:
+            user.profile_pic_thumbnail.delete(save=False)
+            user.profile_pic_thumbnail = None
+        user.profile_pic_url = user.profile_pic_thumbnail_url = ''
         user.save()
+        Comment.update_author_avatar(user)
 
         return Response(
             {"detail": "аватарка успішно видалена."},
@@ -305,14 +362,15 @@ class UploadProfilePhoto(NotBannedMixin, APIView):
 
 
 class LotDetail(NotBannedMixin, APIView):
-    def get_object(self, pk):
+    def get_object(self, pk, queryset=None):
+        queryset = queryset if queryset is not None else Lot.objects.all()
         try:
-            return Lot.objects.get(pk=pk)
+            return queryset.get(pk=pk)
         except Lot.DoesNotExist:
             raise Http404
 
     def get(self, request, pk):
-        lot = self.get_object(pk)
+        lot = self.get_object(pk, Lot.objects.with_relations())
         serializer = LotSerializer(lot)
         return Response(serializer.data)
 
@@ -330,8 +388,7 @@ class LotDetail(NotBannedMixin, APIView):
 
                 if parent_comment.parent_id is not None:
                     actual_parent_id = parent_comment.parent_id
-                    replied_to_user = parent_comment.user
-                    text = f"@{replied_to_user.first_name} {replied_to_user.last_name}: {text}"
+                    text = f"@{parent_comment.author_name}: {text}"
                 else:
                     actual_parent_id = parent_id
 
@@ -355,45 +412,45 @@ class LotDetail(NotBannedMixin, APIView):
             }
             comment_serializer = CommentSerializer(data=comment_data)
             comment_serializer.is_valid(raise_exception=True)
-            comment_serializer.save()
+            publish_comment(comment_serializer.save())
 
             return Response(
                 {"detail": "відповідь успішно додано."},
                 status=status.HTTP_201_CREATED
             )
 
-        # for discord
-        previous_bid = Bid.objects.filter(lot=lot).order_by('-amount').first()
-
         if amount:
-            bid_data = {"user": user.id, "lot": lot.id, "amount": amount}
-            bid_serializer = BidSerializer(data=bid_data)
-            bid_serializer.is_valid(raise_exception=True)
-            bid = bid_serializer.save()
-
-            # for discord
-            bid.is_overbid = False
-            bid.save(update_fields=['is_overbid'])
-
-            Bid.objects.filter(lot=lot, is_overbid=False).exclude(id=bid.id).update(is_overbid=True)
-
-            lot.last_bet = bid.amount
-            lot.save(update_fields=["last_bet"])
-
-            # send notification
-            if previous_bid:
-                notification_service.notify_bid_overbid_sync(previous_bid=previous_bid, new_bid=bid, lot=lot)
-
-            if text:
-                comment_data = {
-                    "user": user.id,
-                    "lot": lot.id,
-                    "text": text,
-                    "bid": bid.id
-                }
-                comment_serializer = CommentSerializer(data=comment_data)
-                comment_serializer.is_valid(raise_exception=True)
-                comment_serializer.save()
+            rate_limit = get_rate_limit('bid')
+            if not rate_limit.hit(user.pk):
+                return Response(
+                    {"detail": "забагато ставок, спробуйте пізніше."},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS
+                )
+
+            try:
+                with transaction.atomic():
+                    bid, previous_bid = place_bid(user, lot.id, amount)
+                    publish_bid(bid)
+
+                    if text:
+                        comment_data = {
+                            "user": user.id,
+                            "lot": lot.id,
+                            "text": text,
+                            "bid": bid.id
+                        }
+                        comment_serializer = CommentSerializer(data=comment_data)
+                        comment_serializer.is_valid(raise_exception=True)
+                        publish_comment(comment_serializer.save())
+
+                    # queued in the outbox with the bid, delivered by run_notification_worker
+                    if previous_bid:
+                        notification_service.enqueue_bid_overbid(previous_bid=previous_bid, new_bid=bid, lot=lot)
+            except ValidationError:
+                # only bids that pass validation count towards the limit
+                rate_limit.undo()
+                raise
+
             return Response(
                 {"detail": "ставку успішно додано."},
                 status=status.HTTP_201_CREATED
@@ -403,7 +460,7 @@ class LotDetail(NotBannedMixin, APIView):
             comment_data = {"user": user.id, "lot": lot.id, "text": text}
             comment_serializer = CommentSerializer(data=comment_data)
             comment_serializer.is_valid(raise_exception=True)
-            comment_serializer.save()
+            publish_comment(comment_serializer.save())
 
             return Response(
                 {"detail": "коментар успішно доданий."},
@@ -427,6 +484,77 @@ class LotDetail(NotBannedMixin, APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class LotComments(APIView):
+    def get(self, request, pk):
+        if not Lot.objects.filter(pk=pk).exists():
+            raise Http404
+
+        top_level = Comment.objects.filter(lot_id=pk, parent__isnull=True)
+
+        paginator = CommentThreadPagination()
+        page = paginator.paginate_queryset(top_level, request, view=self)
+
+        replies = {}
+        reply_qs = Comment.objects.filter(parent__in=page).order_by('created_at', 'id')
+        for reply in reply_qs:
+            replies.setdefault(reply.parent_id, []).append(reply)
+
+        serializer = CommentWithRepliesSerializer(
+            page, many=True, context={'request': request, 'replies': replies}
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+
+class LotBids(APIView):
+    def get(self, request, pk):
+        try:
+            lot = Lot.objects.get(pk=pk)
+        except Lot.DoesNotExist:
+            raise Http404
+
+        bids = Bid.objects.filter(lot=lot).select_related('user')
+
+        paginator = BidHistoryPagination()
+        page = paginator.paginate_queryset(bids, request, view=self)
+
+        response = paginator.get_paginated_response(BidHistorySerializer(page, many=True).data)
+        response.data["stats"] = LotBidStatsSerializer(lot).data
+        return response
+
+
+class LotEvents(APIView):
+    """Server-sent events with the lot's new bids and comments, instead of polling LotDetail."""
+
+    def get(self, request, pk):
+        if not isinstance(request._request, ASGIRequest):
+            # WSGI collects an async stream into a list before sending it, so this one would never answer
+            return Response(
+                {"detail": "оновлення в реальному часі доступні лише під ASGI-сервером."},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+        if not Lot.objects.filter(pk=pk).exists():
+            raise Http404
+
+        response = StreamingHttpResponse(self.stream(pk), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, pk):
+        heartbeat = getattr(settings, 'LOT_EVENTS_HEARTBEAT_SECONDS', 15)
+        subscription = get_broker().subscribe(pk)
+        try:
+            yield ': subscribed\n\n'
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscription.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+        finally:
+            # the client went away
+            subscription.close()
+
+
 class Feedback(NotBannedMixin, APIView):
     def post(self, request):
         name = request.data.get("name")
@@ -487,13 +615,22 @@ class ComplaintsList(APIView):
 
 class ComplaintDetail(NotBannedMixin, APIView):
     def post(self, request, pk):
+        rate_limit = get_rate_limit('complaint')
+        if not rate_limit.hit(request.user.pk):
+            return Response(
+                {"detail": "забагато скарг, спробуйте пізніше."},
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+
         data = {
             "user": request.user.id,
             "theme": pk,
             "text": request.data.get("text")
         }
         serializer = ComplaintsSerializer(data=data)
-        serializer.is_valid(raise_exception=True)
+        if not serializer.is_valid():
+            rate_limit.undo()
+            raise ValidationError(serializer.errors)
         serializer.save()
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -505,83 +642,90 @@ class MyBids(NotBannedMixin, APIView):
     def get(self, request):
         status_filter = request.query_params.get("status")
 
-        latest_bids_subquery = Bid.objects.filter(
-            user=request.user
-        ).values('lot').annotate(
-            max_id=Max('id')
-        ).values('max_id')
-
-        bids = Bid.objects.filter(
-            id__in=latest_bids_subquery
-        ).select_related('lot', 'lot__user').order_by('-created_at')
+        positions = UserLotPosition.objects.filter(user=request.user)
+        counts = positions.aggregate(
+            all=Count('id'),
+            active=Count('id', filter=Q(is_overbid=False)),
+            overbid=Count('id', filter=Q(is_overbid=True)),
+        )
 
         if status_filter == "overbid":
-            bids = bids.filter(is_overbid=True)
+            positions = positions.filter(is_overbid=True)
         elif status_filter == "active":
-            bids = bids.filter(is_overbid=False)
+            positions = positions.filter(is_overbid=False)
+
+        paginator = MyBidsPagination()
+        page = paginator.paginate_queryset(positions.select_related('lot'), request, view=self)
 
         data = []
-        for bid in bids:
+        for position in page:
             data.append({
-                'id': bid.id,
-                'amount': bid.amount,
-                'created_at': bid.created_at,
-                'is_overbid': bid.is_overbid,
-                'lot': bid.lot.id,
+                'id': position.bid_id,
+                'amount': position.amount,
+                'created_at': position.bid_at,
+                'is_overbid': position.is_overbid,
+                'lot': position.lot_id,
                 'lot_info': {
-                    'id': bid.lot.id,
-                    'lot_number': bid.lot.id,
-                    'first_name': bid.lot.first_name,
-                    'last_name': bid.lot.last_name,
-                    'current_bet': bid.lot.last_bet,
+                    'id': position.lot_id,
+                    'lot_number': position.lot_id,
+                    'first_name': position.lot.first_name,
+                    'last_name': position.lot.last_name,
+                    'current_bet': position.lot.last_bet,
                 }
             })
 
-        return Response(data)
+        response = paginator.get_paginated_response(data)
+        response.data["counts"] = counts
+        return response
 
 
-class FacultyList(APIView):
+class ReferenceList(APIView):
+    reference_name = None
+
     def get(self, request):
-        faculties = Faculty.objects.all()
-        serializer = FacultySerializer(faculties, many=True)
-        return Response(serializer.data)
+        state = get_reference_state()
+        return conditional_reference_response(
+            request, state,
+            lambda: self.filter_data(request, get_reference_data(self.reference_name, state)),
+            etag_prefix=self.reference_name,
+        )
 
+    def filter_data(self, request, data):
+        return data
 
-class MajorList(APIView):
-    def get(self, request):
+
+class FacultyList(ReferenceList):
+    reference_name = 'faculties'
+
+
+class MajorList(ReferenceList):
+    reference_name = 'majors'
+
+    def filter_data(self, request, data):
         faculty_id = request.query_params.get('faculty')
 
         if faculty_id:
-            majors = Major.objects.filter(faculty_id=faculty_id)
-        else:
-            majors = Major.objects.all()
+            return [major for major in data if str(major['faculty']) == faculty_id]
+        return data
 
-        serializer = MajorSerializer(majors, many=True)
-        return Response(serializer.data)
 
+class RoleList(ReferenceList):
+    reference_name = 'roles'
 
-class RoleList(APIView):
-    def get(self, request):
-        roles = Role.objects.all()
-        serializer = RoleSerializer(roles, many=True)
-        return Response(serializer.data)
 
+class YearList(ReferenceList):
+    reference_name = 'years'
 
-class YearList(APIView):
-    def get(self, request):
-        from user.models import Year
-        from user.serializers import YearSerializer
 
-        years = Year.objects.all()
-        serializer = YearSerializer(years, many=True)
-        return Response(serializer.data)
+class GenderList(ReferenceList):
+    reference_name = 'genders'
 
 
-class GenderList(APIView):
+class ReferenceData(APIView):
     def get(self, request):
-        from user.models import Gender
-        from user.serializers import GenderSerializer
-
-        genders = Gender.objects.all()
-        serializer = GenderSerializer(genders, many=True)
-        return Response(serializer.data)
+        state = get_reference_state()
+        return conditional_reference_response(
+            request, state,
+            lambda: {name: get_reference_data(name, state) for name in REFERENCE_SOURCES},
+            etag_prefix='reference',
+        )
@@ -0,0 +1,84 @@
+"""
+HomePage page latency near the top and deep into the feed: page-number pagination
+(COUNT + OFFSET) against ?pagination=cursor, for every sort.
+
+    python -m benchmarks.feed_pagination --lots 100000 --deep-page 500
+
+Runs against a throwaway test database on the configured backend. The cursor for the
+deep page is taken from the row just before it, as a client scrolling there would hold.
+"""
+import argparse
+import random
+
+from benchmarks.utils import setup_django, test_database, timed
+
+setup_django()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from rest_framework.test import APIRequestFactory, force_authenticate  # noqa: E402
+
+from auction.feed import FEED_SORTS, filter_feed  # noqa: E402
+from auction.models import Lot  # noqa: E402
+from auction.pagination import LotPagination, FeedCursorPagination  # noqa: E402
+from auction.views import HomePage  # noqa: E402
+
+User = get_user_model()
+
+
+def populate(count, batch_size=5000):
+    for start in range(0, count, batch_size):
+        size = min(batch_size, count - start)
+        users = User.objects.bulk_create([User(email=f'bench{start + i}@ukma.edu.ua') for i in range(size)])
+        Lot.objects.bulk_create([Lot(user=user, last_bet=random.randrange(0, 5000, 10)) for user in users])
+
+
+def cursor_before(sort, page):
+    """The cursor a client holds after scrolling through page - 1 pages."""
+    if page == 1:
+        return None
+    paginator = FeedCursorPagination()
+    offset = (page - 1) * paginator.page_size - 1
+    lots = filter_feed({'sort': sort})
+    paginator.ordering = paginator.get_ordering(lots)
+    return paginator.encode_cursor(lots[offset])
+
+
+def main(count, deep_page, repeat):
+    random.seed(42)
+    factory = APIRequestFactory()
+    view = HomePage.as_view()
+
+    def fetch(params):
+        request = factory.get('/', params)
+        force_authenticate(request, user=viewer)
+        response = view(request)
+        assert response.status_code == 200, response.status_code
+        return response
+
+    with test_database() as connection:
+        populate(count)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE auction_lot')
+        viewer = User.objects.create(email='viewer@ukma.edu.ua')
+        print(f"{count} lots on {connection.vendor}, median of {repeat} runs, "
+              f"{LotPagination.page_size} lots per page")
+
+        for sort in FEED_SORTS:
+            row = []
+            for page in (1, deep_page):
+                offset = timed(lambda: fetch({'sort': sort, 'page': page}), repeat)
+                cursor = cursor_before(sort, page)
+                params = {'sort': sort, 'pagination': 'cursor', **({'cursor': cursor} if cursor else {})}
+                keyset = timed(lambda: fetch(params), repeat)
+                row.append(f"page {page:>4}: offset {offset:7.1f} ms  cursor {keyset:7.1f} ms")
+            print(f"  {sort:>16}  " + "   ".join(row))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lots', type=int, default=100_000)
+    parser.add_argument('--deep-page', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+    main(args.lots, args.deep_page, args.repeat)
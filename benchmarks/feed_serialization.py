@@ -0,0 +1,90 @@
+"""
+Serialization cost of lot pages: URLs built from the files on every request (rows saved
+before URLs were stored, or with the URL fields empty) against the URLs stored at upload.
+
+    python -m benchmarks.feed_serialization --lots 12 --comments 20
+
+Rows are loaded once per page, so the numbers are the serializers alone: LotSerializer
+(lot detail / MyLot) and LotFeedSerializer (HomePage). Cloudinary builds its URLs locally,
+so a dummy cloud name is enough.
+"""
+import argparse
+
+from benchmarks.utils import setup_django, test_database, timed
+
+setup_django()
+
+import cloudinary  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from auction.models import Lot, Comment  # noqa: E402
+from auction.serializers import LotSerializer, LotFeedSerializer  # noqa: E402
+from user.models import UserPhotos  # noqa: E402
+from user.storage import upload_url  # noqa: E402
+
+User = get_user_model()
+
+
+def populate(lots, comments):
+    commenter = User.objects.create(
+        email='commenter@ukma.edu.ua', profile_pic='profile_pic/c.jpg',
+        profile_pic_thumbnail='profile_pic/thumbnails/c.webp',
+    )
+    for i in range(lots):
+        owner = User.objects.create(email=f'owner{i}@ukma.edu.ua')
+        lot = Lot.objects.create(user=owner, last_bet=10)
+        UserPhotos.objects.bulk_create([
+            UserPhotos(user=owner, photo=f'photos/{i}-{n}.jpg', thumbnail=f'photos/thumbnails/{i}-{n}.webp')
+            for n in range(Lot.MAX_PHOTOS)
+        ])
+        Comment.objects.bulk_create([Comment(user=commenter, lot=lot, text='hi') for _ in range(comments)])
+
+
+def store_urls(request):
+    for model, pairs in [
+        (UserPhotos, [('photo', 'photo_url'), ('thumbnail', 'thumbnail_url')]),
+        (User, [('profile_pic', 'profile_pic_url'), ('profile_pic_thumbnail', 'profile_pic_thumbnail_url')]),
+    ]:
+        rows = list(model.objects.all())
+        for row in rows:
+            for file_field, url_field in pairs:
+                file = getattr(row, file_field)
+                if file:
+                    setattr(row, url_field, upload_url(model._meta.get_field(file_field), file.name, request))
+        model.objects.bulk_update(rows, [url_field for _, url_field in pairs])
+
+
+def measure(request, repeat):
+    detail_page = list(Lot.objects.with_relations())
+    feed_page = list(Lot.objects.for_feed())
+    context = {'request': request}
+    detail = timed(lambda: LotSerializer(detail_page, many=True, context=context).data, repeat)
+    feed = timed(lambda: LotFeedSerializer(feed_page, many=True, context=context).data, repeat)
+    return detail, feed
+
+
+def main(lots, comments, repeat):
+    cloudinary.config(cloud_name='bench')
+    request = APIRequestFactory().get('/')
+
+    with test_database() as connection:
+        populate(lots, comments)
+        print(f"{lots} lots x {Lot.MAX_PHOTOS} photos, {comments} comments each, on {connection.vendor}; "
+              f"median of {repeat} runs")
+
+        before = measure(request, repeat)
+        store_urls(request)
+        after = measure(request, repeat)
+
+        for name, built, stored in zip(['LotSerializer', 'LotFeedSerializer'], before, after):
+            print(f"  {name:>17}: built per request {built:7.2f} ms   stored {stored:7.2f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lots', type=int, default=12)
+    parser.add_argument('--comments', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    main(args.lots, args.comments, args.repeat)
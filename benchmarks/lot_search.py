@@ -0,0 +1,83 @@
+"""
+HomePage search latency: the old icontains over the joined user names against
+auction.search.search_lots, over a synthetic table of lots.
+
+    python -m benchmarks.lot_search --lots 100000
+
+Runs against a throwaway test database on the configured backend; on PostgreSQL
+search_lots uses the full-text and trigram indexes from migration 0004.
+"""
+import argparse
+import random
+import string
+
+from benchmarks.utils import setup_django, test_database, timed
+
+setup_django()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db.models import Q  # noqa: E402
+
+from auction.models import Lot  # noqa: E402
+from auction.search import search_lots, order_by_rank  # noqa: E402
+
+User = get_user_model()
+
+FIRST_NAMES = ['Anna', 'Petro', 'Olena', 'Taras', 'Iryna', 'Mykola', 'Sofiia', 'Dmytro', 'Daria', 'Andrii']
+WORDS = ['hiking', 'jazz', 'coffee', 'books', 'chess', 'music', 'travel', 'cats', 'football', 'cinema']
+
+
+def random_word(length=7):
+    return ''.join(random.choices(string.ascii_lowercase, k=length)).capitalize()
+
+
+def populate(count, batch_size=5000):
+    for start in range(0, count, batch_size):
+        size = min(batch_size, count - start)
+        users = User.objects.bulk_create([
+            User(
+                email=f'bench{start + i}@ukma.edu.ua',
+                first_name=random.choice(FIRST_NAMES),
+                last_name=random_word(),
+            )
+            for i in range(size)
+        ])
+        lots = []
+        for user in users:
+            lot = Lot(user=user, description=' '.join(random.sample(WORDS, 3)), **Lot.owner_values(user))
+            lot.search_document = lot.build_search_document()
+            lots.append(lot)
+        Lot.objects.bulk_create(lots)
+
+
+def icontains_page(term):
+    lots = Lot.objects.filter(
+        Q(user__first_name__icontains=term) | Q(user__last_name__icontains=term)
+    ).order_by('-created_at')
+    return lots.count(), list(lots[:12])
+
+
+def search_page(term):
+    lots, ranked = search_lots(Lot.objects.all(), term)
+    if ranked:
+        lots = order_by_rank(lots)
+    return lots.count(), list(lots[:12])
+
+
+def main(count, repeat):
+    random.seed(42)
+    with test_database() as connection:
+        populate(count)
+        print(f"{count} lots on {connection.vendor}, median of {repeat} runs (count + first page)")
+        for term in ['Olena', 'taras', 'jazz', 'zzqx']:
+            before = timed(lambda: icontains_page(term), repeat)
+            after = timed(lambda: search_page(term), repeat)
+            print(f"  {term!r:>8}: icontains {before:8.1f} ms   search_lots {after:8.1f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lots', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+    main(args.lots, args.repeat)
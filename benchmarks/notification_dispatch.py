@@ -0,0 +1,86 @@
+"""
+Notification dispatch throughput: a new aiohttp session per send (the old DiscordChannel)
+against the pooled keep-alive session, both posting to a local stub bot server.
+
+    python -m benchmarks.notification_dispatch --count 500 --concurrency 10
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+import aiohttp
+import django
+from aiohttp import web
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'DatingAuction.settings')
+django.setup()
+
+from notifications.services import DiscordChannel  # noqa: E402
+
+logging.getLogger('notifications').setLevel(logging.WARNING)
+
+
+async def start_stub_bot():
+    async def handle_notify(request):
+        await request.json()
+        return web.json_response({'status': 'ok'})
+
+    app = web.Application()
+    app.add_routes([web.post('/notify', handle_notify)])
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', 0).start()
+    return runner, f'http://127.0.0.1:{runner.addresses[0][1]}'
+
+
+async def send_with_new_session(bot_url, recipient, message):
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5)) as session:
+        async with session.post(f'{bot_url}/notify', json={'discord_id': recipient, 'message': message}) as response:
+            return response.status == 200
+
+
+async def run(send, count, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            return await send(str(i), 'benchmark')
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(count)))
+    elapsed = time.perf_counter() - started
+    assert all(results)
+    return count / elapsed
+
+
+async def main(count, concurrency):
+    runner, bot_url = await start_stub_bot()
+    try:
+        per_send = await run(
+            lambda recipient, message: send_with_new_session(bot_url, recipient, message), count, concurrency
+        )
+
+        channel = DiscordChannel()
+        channel.bot_url = bot_url
+        try:
+            pooled = await run(
+                lambda recipient, message: channel.send(recipient=recipient, message=message), count, concurrency
+            )
+        finally:
+            await channel.close()
+    finally:
+        await runner.cleanup()
+
+    print(f"{count} notifications, concurrency {concurrency}")
+    print(f"  session per send: {per_send:8.0f} notifications/s")
+    print(f"  pooled session:   {pooled:8.0f} notifications/s  ({pooled / per_send:.1f}x)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.count, args.concurrency))
@@ -4,6 +4,8 @@ import discord
 from discord.ext import commands
 from dotenv import load_dotenv
 
+from discord_bot.cache import TTLCache
+
 load_dotenv()
 
 intents = discord.Intents.default()
@@ -12,6 +14,14 @@ intents.members = True
 
 bot = commands.Bot(command_prefix='!', intents=intents)
 
+# discord_id -> DM channel, so repeat notifications skip fetch_user/create_dm round-trips.
+# NotFound/Forbidden ids are cached as negative entries for a shorter time so we stop retrying them.
+dm_channels = TTLCache(
+    maxsize=int(os.getenv('DM_CACHE_SIZE', 5000)),
+    ttl=int(os.getenv('DM_CACHE_TTL', 3600)),
+    negative_ttl=int(os.getenv('DM_CACHE_NEGATIVE_TTL', 600)),
+)
+
 
 @bot.event
 async def on_ready():
@@ -34,9 +44,22 @@ async def get_discord_id(ctx):
 
     await ctx.send(embed=embed)
 
+async def resolve_dm_channel(discord_id: str):
+    cached = dm_channels.get(discord_id)
+    if cached is not None:
+        return cached
+
+    user = bot.get_user(int(discord_id)) or await bot.fetch_user(int(discord_id))
+    channel = user.dm_channel or await user.create_dm()
+    dm_channels.set(discord_id, channel)
+    return channel
+
+
 async def send_notification(discord_id: str, message: str, lot_id: int = None):
     try:
-        user = await bot.fetch_user(int(discord_id))
+        channel = await resolve_dm_channel(discord_id)
+        if channel is TTLCache.NEGATIVE:
+            return False
 
         embed = discord.Embed(
             title='bid notification',
@@ -52,21 +75,29 @@ async def send_notification(discord_id: str, message: str, lot_id: int = None):
                 inline=False
             )
 
-            embed.set_footer(text='dating auction bot')
+        embed.set_footer(text='dating auction bot')
 
-            await user.send(embed=embed)
-            return True
+        await channel.send(embed=embed)
+        return True
 
     except discord.NotFound:
         print(f'Discord ID {discord_id} not found')
+        dm_channels.set_negative(discord_id)
         return False
     except discord.Forbidden:
         print(f'Cannot send DM to {discord_id}')
+        dm_channels.set_negative(discord_id)
         return False
     except Exception as e:
         print(e)
         return False
 
 
+def cache_stats():
+    return {
+        'dm_channels': dm_channels.stats(),
+    }
+
+
 if __name__ == '__main__':
     bot.run(os.getenv('DISCORD_BOT_TOKEN'))
@@ -1,6 +1,13 @@
+import asyncio
+import os
+
 from aiohttp import web
 
-from discord_bot.bot import send_notification
+from discord_bot.bot import send_notification, cache_stats
+
+# discord.py already waits out 429s; this only caps how many DMs are in flight at once
+NOTIFY_BATCH_CONCURRENCY = int(os.getenv('NOTIFY_BATCH_CONCURRENCY', 5))
+NOTIFY_BATCH_MAX_SIZE = int(os.getenv('NOTIFY_BATCH_MAX_SIZE', 100))
 
 
 async def handle_notify(request):
@@ -25,7 +32,59 @@ async def handle_notify(request):
             'message': str(e),
         },   status=500)
 
+
+async def _notify_one(item, semaphore):
+    if not isinstance(item, dict):
+        return {'status': 'error', 'message': 'notification must be an object'}
+
+    discord_id = item.get('discord_id')
+    message = item.get('message')
+
+    if not discord_id or not message:
+        return {'status': 'error', 'message': 'missing required fields', 'discord_id': discord_id}
+
+    try:
+        async with semaphore:
+            success = await send_notification(discord_id, message, item.get('lot_id'))
+    except Exception as e:
+        return {'status': 'error', 'message': str(e), 'discord_id': discord_id}
+
+    return {'status': 'ok' if success else 'failed', 'discord_id': discord_id}
+
+
+async def handle_notify_batch(request):
+    try:
+        data = await request.json()
+    except Exception as e:
+        return web.json_response({'status': 'error', 'message': str(e)}, status=400)
+
+    notifications = data.get('notifications') if isinstance(data, dict) else None
+
+    if not isinstance(notifications, list) or not notifications:
+        return web.json_response({
+            'status': 'error', 'message': 'notifications must be a non-empty list'},
+        status=400)
+
+    if len(notifications) > NOTIFY_BATCH_MAX_SIZE:
+        return web.json_response({
+            'status': 'error', 'message': f'at most {NOTIFY_BATCH_MAX_SIZE} notifications per batch'},
+        status=400)
+
+    semaphore = asyncio.Semaphore(NOTIFY_BATCH_CONCURRENCY)
+    results = await asyncio.gather(*(_notify_one(item, semaphore) for item in notifications))
+
+    return web.json_response({'status': 'ok', 'results': results})
+
+
+async def handle_stats(request):
+    return web.json_response(cache_stats())
+
+
 def create_app():
     app = web.Application()
-    app.add_routes([web.post('/notify', handle_notify)])
+    app.add_routes([
+        web.post('/notify', handle_notify),
+        web.post('/notify/batch', handle_notify_batch),
+        web.get('/stats', handle_stats),
+    ])
     return app
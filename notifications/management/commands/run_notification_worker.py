@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from notifications.worker import OutboxWorker
+
+
+class Command(BaseCommand):
+    help = "Delivers queued notifications from the outbox, retrying failed sends with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Process one batch and exit.")
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        worker = OutboxWorker(batch_size=options['batch_size'])
+
+        if options['once']:
+            processed = worker.process_once()
+            worker.close()
+            self.stdout.write(f"processed {processed} notification(s)")
+            return
+
+        try:
+            worker.run(poll_interval=options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("notification worker stopped")
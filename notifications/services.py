@@ -3,7 +3,6 @@ from typing import Optional
 import aiohttp
 import asyncio
 from django.conf import settings
-from asgiref.sync import sync_to_async
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,30 +21,59 @@ class NotificationChannel(ABC):
     def get_recipient_id(self, user) -> Optional[str]:
         pass
 
+    async def send_batch(self, notifications: list) -> list:
+        # each item holds send() kwargs; returns one bool per item, in order
+        return list(await asyncio.gather(*(self.send(**notification) for notification in notifications)))
+
+    async def close(self):
+        pass
+
 
 class DiscordChannel(NotificationChannel):
     def __init__(self):
         self.bot_url = getattr(settings, 'DISCORD_BOT_URL', 'http://localhost:5005')
+        self.timeout = getattr(settings, 'DISCORD_HTTP_TIMEOUT_SECONDS', 5)
+        self.pool_limit = getattr(settings, 'DISCORD_HTTP_POOL_LIMIT', 20)
+        self.keepalive_timeout = getattr(settings, 'DISCORD_HTTP_KEEPALIVE_SECONDS', 30)
+        self.batch_size = getattr(settings, 'DISCORD_NOTIFY_BATCH_SIZE', 50)
+        self._session = None
+        self._session_loop = None
+
+    def get_session(self) -> aiohttp.ClientSession:
+        # one keep-alive pool per event loop; a session can't outlive or move between loops
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.pool_limit, keepalive_timeout=self.keepalive_timeout)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
 
     async def send(self, recipient: str, message: str, **kwargs) -> bool:
         try:
-            timeout = aiohttp.ClientTimeout(total=5)
-
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(
-                        f'{self.bot_url}/notify',
-                        json={
-                            'discord_id': recipient,
-                            'message': message,
-                            **kwargs
-                        }
-                ) as response:
-                    if response.status == 200:
-                        logger.info(f"Discord notification sent to {recipient}")
-                        return True
-                    else:
-                        logger.warning(f"Discord notification failed with status {response.status}")
-                        return False
+            session = self.get_session()
+            async with session.post(
+                    f'{self.bot_url}/notify',
+                    json={
+                        'discord_id': recipient,
+                        'message': message,
+                        **kwargs
+                    }
+            ) as response:
+                if response.status == 200:
+                    logger.info(f"Discord notification sent to {recipient}")
+                    return True
+                else:
+                    logger.warning(f"Discord notification failed with status {response.status}")
+                    return False
 
         except aiohttp.ClientConnectorError:
             logger.error(f"Discord bot server unavailable for {recipient}")
@@ -57,6 +85,45 @@ class DiscordChannel(NotificationChannel):
             logger.error(f"Discord notification error: {e}")
             return False
 
+    async def send_batch(self, notifications: list) -> list:
+        results = []
+        for start in range(0, len(notifications), self.batch_size):
+            results.extend(await self._send_chunk(notifications[start:start + self.batch_size]))
+        return results
+
+    async def _send_chunk(self, notifications: list) -> list:
+        items = [
+            {'discord_id': n['recipient'], 'message': n['message'],
+             **{key: value for key, value in n.items() if key not in ('recipient', 'message')}}
+            for n in notifications
+        ]
+
+        try:
+            session = self.get_session()
+            async with session.post(f'{self.bot_url}/notify/batch', json={'notifications': items}) as response:
+                if response.status != 200:
+                    logger.warning(f"Discord batch notification failed with status {response.status}")
+                    return [False] * len(items)
+                data = await response.json()
+
+        except aiohttp.ClientConnectorError:
+            logger.error(f"Discord bot server unavailable for batch of {len(items)}")
+            return [False] * len(items)
+        except asyncio.TimeoutError:
+            logger.error(f"Discord batch notification timeout for batch of {len(items)}")
+            return [False] * len(items)
+        except Exception as e:
+            logger.error(f"Discord batch notification error: {e}")
+            return [False] * len(items)
+
+        results = [result.get('status') == 'ok' for result in data.get('results', [])]
+        if len(results) != len(items):
+            logger.error("Discord batch notification returned a mismatched number of results")
+            return [False] * len(items)
+
+        logger.info(f"Discord batch notification: {sum(results)}/{len(items)} sent")
+        return results
+
     def is_enabled_for_user(self, user) -> bool:
         return bool(getattr(user, 'discord_id', None))
 
@@ -74,17 +141,26 @@ class NotificationService:
             if channel.is_enabled_for_user(user)
         ]
 
-    async def notify_bid_overbid(self, previous_bid, new_bid, lot) -> bool:
-        # wrap django ORM access in sync_to_async
-        previous_bidder = await sync_to_async(lambda: previous_bid.user)()
+    async def close(self):
+        for channel in self.channels.values():
+            await channel.close()
+
+    def enqueue_bid_overbid(self, previous_bid, new_bid, lot) -> bool:
+        """
+        Stores the overbid notification in the outbox; the worker delivers it.
+
+        Call it inside the bid transaction: the row commits (and becomes visible
+        to the worker) together with the bid, or not at all.
+        """
+        from notifications.models import NotificationOutbox
+
+        previous_bidder = previous_bid.user
         enabled_channels = self.get_enabled_channels(previous_bidder)
 
         if not enabled_channels:
             logger.info(f"No notification channels enabled for user {previous_bidder.id}")
             return False
 
-        message = await self._format_overbid_message(previous_bid, new_bid, lot)
-
         channel_name = enabled_channels[0]
         channel = self.channels[channel_name]
 
@@ -93,52 +169,24 @@ class NotificationService:
             logger.warning(f"No recipient ID for channel {channel_name}")
             return False
 
-        lot_id = await sync_to_async(lambda: lot.id)()
-
-        success = await channel.send(
+        NotificationOutbox.objects.create(
+            channel=channel_name,
             recipient=recipient,
-            message=message,
-            lot_id=lot_id
+            message=self._format_overbid_message(previous_bid, new_bid, lot),
+            payload={'lot_id': lot.id},
         )
+        return True
 
-        return success
-
-    async def _format_overbid_message(self, previous_bid, new_bid, lot) -> str:
-        # wrap all django ORM access
-        prev_amount = await sync_to_async(lambda: previous_bid.amount)()
-        new_amount = await sync_to_async(lambda: new_bid.amount)()
-        new_bidder_first_name = await sync_to_async(lambda: new_bid.user.first_name)()
-        new_bidder_last_name = await sync_to_async(lambda: new_bid.user.last_name)()
-        new_bidder = f'{new_bidder_first_name} {new_bidder_last_name}'.strip()
-
-        first_name = await sync_to_async(lambda: lot.user.first_name)()
-        last_name = await sync_to_async(lambda: lot.user.last_name)()
-        lot_name = f"{first_name} {last_name}".strip()
-
-        if not lot_name:
-            lot_name = ""
+    def _format_overbid_message(self, previous_bid, new_bid, lot) -> str:
+        new_bidder = f'{new_bid.user.first_name} {new_bid.user.last_name}'.strip()
+        lot_name = f"{lot.user.first_name} {lot.user.last_name}".strip()
 
         message = (
-            f"Твоя ставка в {prev_amount} грн на лот {lot_name} була перебита!\n\n"
-            f"Нова ставка: {new_amount} грн\n"
+            f"Твоя ставка в {previous_bid.amount} грн на лот {lot_name} була перебита!\n\n"
+            f"Нова ставка: {new_bid.amount} грн\n"
             f"Поставлена: {new_bidder}"
         )
 
         return message
 
-    def notify_bid_overbid_sync(self, previous_bid, new_bid, lot) -> bool:
-        import asyncio
-
-        try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            result = loop.run_until_complete(
-                self.notify_bid_overbid(previous_bid, new_bid, lot)
-            )
-            loop.close()
-            return result
-        except Exception as e:
-            logger.error(f"Error in notify_bid_overbid_sync: {e}")
-            return False
-
 notification_service = NotificationService()
\ No newline at end of file
@@ -0,0 +1,67 @@
+from unittest import IsolatedAsyncioTestCase
+
+from aiohttp import web
+
+from notifications.services import DiscordChannel
+
+
+class DiscordChannelSessionTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.peers = []
+
+        async def handle_notify(request):
+            self.peers.append(request.transport.get_extra_info('peername'))
+            return web.json_response({'status': 'ok'})
+
+        async def handle_notify_batch(request):
+            data = await request.json()
+            self.peers.append(request.transport.get_extra_info('peername'))
+            return web.json_response({'status': 'ok', 'results': [
+                {'status': 'ok' if item['discord_id'] != 'dead' else 'failed', 'discord_id': item['discord_id']}
+                for item in data['notifications']
+            ]})
+
+        app = web.Application()
+        app.add_routes([web.post('/notify', handle_notify), web.post('/notify/batch', handle_notify_batch)])
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+
+        self.channel = DiscordChannel()
+        self.channel.bot_url = f'http://127.0.0.1:{port}'
+
+    async def asyncTearDown(self):
+        await self.channel.close()
+        await self.runner.cleanup()
+
+    async def test_sends_reuse_one_keep_alive_connection(self):
+        for i in range(3):
+            self.assertTrue(await self.channel.send(recipient=str(i), message='hi', lot_id=1))
+
+        self.assertEqual(len(self.peers), 3)
+        self.assertEqual(len(set(self.peers)), 1)
+
+    async def test_close_releases_session_and_next_send_reopens_it(self):
+        await self.channel.send(recipient='1', message='hi')
+        session = self.channel._session
+
+        await self.channel.close()
+        self.assertTrue(session.closed)
+
+        self.assertTrue(await self.channel.send(recipient='1', message='hi'))
+        self.assertIsNot(self.channel._session, session)
+
+    async def test_send_batch_maps_per_item_results_and_chunks(self):
+        self.channel.batch_size = 2
+        notifications = [
+            {'recipient': '1', 'message': 'hi', 'lot_id': 1},
+            {'recipient': 'dead', 'message': 'hi'},
+            {'recipient': '3', 'message': 'hi'},
+        ]
+
+        results = await self.channel.send_batch(notifications)
+
+        self.assertEqual(results, [True, False, True])
+        self.assertEqual(len(self.peers), 2)
@@ -0,0 +1,46 @@
+from unittest import TestCase, mock
+
+from discord_bot.cache import TTLCache
+
+
+class TTLCacheTests(TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        clock = mock.patch("discord_bot.cache.time.monotonic", side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.cache = TTLCache(maxsize=2, ttl=60, negative_ttl=10)
+
+    def test_entries_expire_after_the_ttl(self):
+        self.cache.set("a", 1)
+        self.now += 59
+        self.assertEqual(self.cache.get("a"), 1)
+
+        self.now += 1
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        self.cache.set("c", 3)
+
+        self.assertEqual([self.cache.get(key) for key in "abc"], [1, None, 3])
+
+    def test_negative_entries_expire_after_the_negative_ttl(self):
+        self.cache.set_negative("dead")
+        self.assertIs(self.cache.get("dead"), TTLCache.NEGATIVE)
+
+        self.now += 10
+        self.assertIsNone(self.cache.get("dead"))
+
+    def test_negative_hits_are_left_out_of_the_hit_rate(self):
+        self.cache.set("a", 1)
+        self.cache.set_negative("dead")
+        for key in ("a", "dead", "dead", "missing"):
+            self.cache.get(key)
+
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["negative_hits"]), (1, 1, 2))
+        self.assertEqual(stats["hit_rate"], 0.5)
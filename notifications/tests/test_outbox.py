@@ -0,0 +1,133 @@
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from auction.models import Lot, Bid
+from notifications.models import NotificationOutbox
+from notifications.services import notification_service
+from notifications.worker import OutboxWorker
+
+User = get_user_model()
+
+
+class EnqueueOverbidTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.owner = User.objects.create_user(email="owner@ukma.edu.ua", password="x", first_name="O", last_name="W")
+        self.first = User.objects.create_user(email="a@ukma.edu.ua", password="x", discord_id="111")
+        self.second = User.objects.create_user(email="b@ukma.edu.ua", password="x", first_name="B", last_name="C")
+        self.lot = Lot.objects.create(user=self.owner, last_bet=10)
+        Bid.objects.create(user=self.first, lot=self.lot, amount=10)
+
+    def test_overbid_is_queued_without_contacting_discord(self):
+        self.client.force_authenticate(user=self.second)
+
+        with patch.object(notification_service.channels['discord'], 'send', new_callable=AsyncMock) as send_mock:
+            resp = self.client.post(reverse("lot_detail", kwargs={"pk": self.lot.id}), {"amount": 20}, format="json")
+
+        self.assertEqual(resp.status_code, 201)
+        send_mock.assert_not_called()
+
+        queued = NotificationOutbox.objects.get()
+        self.assertEqual(queued.recipient, "111")
+        self.assertEqual(queued.payload, {"lot_id": self.lot.id})
+        self.assertEqual(queued.status, NotificationOutbox.STATUS_PENDING)
+        self.assertIn("20 грн", queued.message)
+
+    def test_nothing_is_queued_for_users_without_discord(self):
+        Bid.objects.update(is_overbid=True)
+        Bid.objects.create(user=self.second, lot=self.lot, amount=20)
+        Lot.objects.filter(pk=self.lot.pk).update(last_bet=20)
+
+        self.client.force_authenticate(user=self.first)
+        resp = self.client.post(reverse("lot_detail", kwargs={"pk": self.lot.id}), {"amount": 30}, format="json")
+
+        self.assertEqual(resp.status_code, 201)
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+
+@override_settings(NOTIFICATION_OUTBOX_MAX_ATTEMPTS=2, NOTIFICATION_OUTBOX_BACKOFF_SECONDS=10)
+class OutboxWorkerTests(TestCase):
+    def setUp(self):
+        self.worker = OutboxWorker()
+        self.addCleanup(self.worker.close)
+        self.row = NotificationOutbox.objects.create(
+            channel="discord", recipient="111", message="hi", payload={"lot_id": 1}
+        )
+        send_patcher = patch.object(notification_service.channels['discord'], 'send_batch', new_callable=AsyncMock)
+        self.send_mock = send_patcher.start()
+        self.addCleanup(send_patcher.stop)
+
+    def test_successful_send_marks_row_sent(self):
+        self.send_mock.return_value = [True]
+
+        self.assertEqual(self.worker.process_once(), 1)
+
+        self.send_mock.assert_awaited_once_with([{"recipient": "111", "message": "hi", "lot_id": 1}])
+        self.row.refresh_from_db()
+        self.assertEqual(self.row.status, NotificationOutbox.STATUS_SENT)
+        self.assertIsNotNone(self.row.sent_at)
+
+    def test_failed_send_is_retried_with_backoff(self):
+        self.send_mock.return_value = [False]
+
+        self.worker.process_once()
+
+        self.row.refresh_from_db()
+        self.assertEqual(self.row.status, NotificationOutbox.STATUS_PENDING)
+        self.assertEqual(self.row.attempts, 1)
+        self.assertGreater(self.row.next_attempt_at, timezone.now() + timedelta(seconds=5))
+        self.assertEqual(self.worker.process_once(), 0)
+
+    def test_gives_up_after_max_attempts(self):
+        self.send_mock.side_effect = RuntimeError("bot down")
+
+        self.worker.process_once()
+        NotificationOutbox.objects.filter(pk=self.row.pk).update(next_attempt_at=timezone.now())
+        self.worker.process_once()
+
+        self.row.refresh_from_db()
+        self.assertEqual(self.row.status, NotificationOutbox.STATUS_FAILED)
+        self.assertEqual(self.row.attempts, 2)
+        self.assertEqual(self.row.last_error, "bot down")
+
+    def test_due_rows_are_flushed_in_one_batch_with_per_item_results(self):
+        failed = NotificationOutbox.objects.create(channel="discord", recipient="222", message="hi")
+        self.send_mock.return_value = [True, False]
+
+        self.assertEqual(self.worker.process_once(), 2)
+
+        self.send_mock.assert_awaited_once()
+        self.row.refresh_from_db()
+        failed.refresh_from_db()
+        self.assertEqual(self.row.status, NotificationOutbox.STATUS_SENT)
+        self.assertEqual(failed.status, NotificationOutbox.STATUS_PENDING)
+        self.assertEqual(failed.attempts, 1)
+
+
+class StopWorker(BaseException):
+    pass
+
+
+class OutboxWorkerRunTests(TestCase):
+    def test_run_survives_a_failed_batch(self):
+        worker = OutboxWorker()
+        batches = patch.object(worker, "process_once", side_effect=[DatabaseError("connection lost"), 1, StopWorker])
+
+        with batches as process_once, patch("notifications.worker.close_old_connections") as close_old, \
+                patch("notifications.worker.time.sleep"), self.assertLogs("notifications.worker", "ERROR") as logs:
+            with self.assertRaises(StopWorker):
+                worker.run()
+
+        self.assertEqual(process_once.call_count, 3)
+        self.assertEqual(close_old.call_count, 3)
+        self.assertIn("connection lost", logs.output[0])
+        self.assertTrue(worker.loop.is_closed())
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from notifications.models import NotificationOutbox
+from notifications.services import notification_service
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxWorker:
+    # a claimed row is hidden from other workers for this long; if the worker dies mid-send it is retried after
+    LEASE_SECONDS = 60
+
+    def __init__(self, service=notification_service, batch_size=None):
+        self.service = service
+        self.batch_size = batch_size or getattr(settings, 'NOTIFICATION_OUTBOX_BATCH_SIZE', 50)
+        self.max_attempts = getattr(settings, 'NOTIFICATION_OUTBOX_MAX_ATTEMPTS', 8)
+        self.backoff_seconds = getattr(settings, 'NOTIFICATION_OUTBOX_BACKOFF_SECONDS', 5)
+        self.backoff_max_seconds = getattr(settings, 'NOTIFICATION_OUTBOX_BACKOFF_MAX_SECONDS', 3600)
+        self.loop = asyncio.new_event_loop()
+
+    def claim_batch(self):
+        now = timezone.now()
+        with transaction.atomic():
+            rows = list(
+                NotificationOutbox.objects.select_for_update(skip_locked=True).filter(
+                    status=NotificationOutbox.STATUS_PENDING,
+                    next_attempt_at__lte=now,
+                ).order_by('next_attempt_at', 'id')[:self.batch_size]
+            )
+            for row in rows:
+                row.attempts += 1
+                row.next_attempt_at = now + timedelta(seconds=self.LEASE_SECONDS)
+            NotificationOutbox.objects.bulk_update(rows, ['attempts', 'next_attempt_at'])
+        return rows
+
+    def get_backoff(self, attempts):
+        return min(self.backoff_seconds * 2 ** (attempts - 1), self.backoff_max_seconds)
+
+    def deliver(self, channel_name, rows):
+        channel = self.service.channels.get(channel_name)
+        if channel is None:
+            return [(False, f"unknown channel {channel_name}")] * len(rows)
+
+        notifications = [
+            {'recipient': row.recipient, 'message': row.message, **row.payload}
+            for row in rows
+        ]
+        try:
+            results = self.loop.run_until_complete(channel.send_batch(notifications))
+        except Exception as e:
+            return [(False, str(e))] * len(rows)
+
+        return [(sent, '' if sent else 'channel rejected the notification') for sent in results]
+
+    def record_result(self, row, sent, error):
+        now = timezone.now()
+        if sent:
+            row.status = NotificationOutbox.STATUS_SENT
+            row.sent_at = now
+            row.last_error = ''
+        elif row.attempts >= self.max_attempts:
+            row.status = NotificationOutbox.STATUS_FAILED
+            row.last_error = error
+            logger.error(f"Giving up on notification {row.id} after {row.attempts} attempts: {error}")
+        else:
+            row.next_attempt_at = now + timedelta(seconds=self.get_backoff(row.attempts))
+            row.last_error = error
+        row.save(update_fields=['status', 'sent_at', 'last_error', 'next_attempt_at'])
+
+    def process_once(self):
+        rows = self.claim_batch()
+
+        by_channel = {}
+        for row in rows:
+            by_channel.setdefault(row.channel, []).append(row)
+
+        for channel_name, channel_rows in by_channel.items():
+            for row, (sent, error) in zip(channel_rows, self.deliver(channel_name, channel_rows)):
+                self.record_result(row, sent, error)
+
+        return len(rows)
+
+    def close(self):
+        self.loop.run_until_complete(self.service.close())
+        self.loop.close()
+
+    def run(self, poll_interval=1.0):
+        logger.info("Notification worker started")
+        try:
+            while True:
+                # a long-lived process: drop connections the database closed or that outlived CONN_MAX_AGE
+                close_old_connections()
+                try:
+                    processed = self.process_once()
+                except Exception:
+                    # e.g. a transient database error; rows claimed by the batch are retried once their lease expires
+                    logger.exception("Notification worker batch failed")
+                    processed = 0
+                if not processed:
+                    time.sleep(poll_interval)
+        finally:
+            self.close()
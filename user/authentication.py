@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    key = user_cache_key(user_id)
+    cache.delete(key)
+    # again after commit: a request running meanwhile may have cached the row as it was before
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def user_cache_enabled():
+    # a per-process cache would only be invalidated in the process that saved the user,
+    # so other workers would keep serving e.g. a banned user until the entry expired
+    if getattr(settings, 'AUTH_USER_CACHE_ALLOW_LOCAL', False):
+        return True
+    return not isinstance(caches['default'], LocMemCache)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that keeps the token's user in the cache for AUTH_USER_CACHE_TIMEOUT seconds,
+    so authenticated requests (and NotBanned, which reads is_banned) don't load the user every time.
+
+    Saving or deleting the user drops the entry (see user/signals.py), so a ban applies to the next request.
+    That needs a cache shared by all workers: with the local-memory cache this behaves like JWTAuthentication,
+    unless AUTH_USER_CACHE_ALLOW_LOCAL says the app runs in a single process.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None or not user_cache_enabled():
+            return super().get_user(validated_token)
+
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(key, user, timeout=getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60))
+            return user
+
+        # the checks JWTAuthentication runs on the user it loads
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
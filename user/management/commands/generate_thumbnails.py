@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from user.models import CustomUser, UserPhotos
+from user.storage import store_files, upload_url
+from user.thumbnails import make_thumbnail, INVALID_IMAGE_ERRORS, PHOTO_THUMBNAIL_SIZE, AVATAR_THUMBNAIL_SIZE
+
+# (model, original field, thumbnail field, thumbnail URL field, size)
+THUMBNAIL_FIELDS = [
+    (UserPhotos, 'photo', 'thumbnail', 'thumbnail_url', PHOTO_THUMBNAIL_SIZE),
+    (CustomUser, 'profile_pic', 'profile_pic_thumbnail', 'profile_pic_thumbnail_url', AVATAR_THUMBNAIL_SIZE),
+]
+
+
+class Command(BaseCommand):
+    help = "Generates thumbnails for photos and profile pictures uploaded before thumbnails existed."
+
+    def handle(self, *args, **options):
+        for model, source, target, target_url, size in THUMBNAIL_FIELDS:
+            missing = model.objects.exclude(Q(**{f'{source}__isnull': True}) | Q(**{source: ''})).filter(
+                Q(**{f'{target}__isnull': True}) | Q(**{target: ''})
+            )
+            target_field = model._meta.get_field(target)
+
+            done = failed = 0
+            for row in missing.iterator():
+                try:
+                    with getattr(row, source).open('rb') as original:
+                        thumbnail = make_thumbnail(original, size)
+                    [name] = store_files([(target_field, thumbnail)])
+                except INVALID_IMAGE_ERRORS as e:
+                    failed += 1
+                    self.stderr.write(f"{model.__name__} {row.pk}: {e}")
+                    continue
+                model.objects.filter(pk=row.pk).update(**{target: name, target_url: upload_url(target_field, name)})
+                done += 1
+
+            self.stdout.write(f"{model.__name__}.{target}: {done} generated, {failed} failed")
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from user.models import CustomUser, UserPhotos
+from user.storage import upload_url
+
+# (model, file field, URL field)
+URL_FIELDS = [
+    (UserPhotos, 'photo', 'photo_url'),
+    (UserPhotos, 'thumbnail', 'thumbnail_url'),
+    (CustomUser, 'profile_pic', 'profile_pic_url'),
+    (CustomUser, 'profile_pic_thumbnail', 'profile_pic_thumbnail_url'),
+]
+
+
+class Command(BaseCommand):
+    help = "Stores the URLs of photos and profile pictures uploaded before URLs were saved at upload time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        for model, file_field, url_field in URL_FIELDS:
+            field = model._meta.get_field(file_field)
+            rows = model.objects.exclude(Q(**{f'{file_field}__isnull': True}) | Q(**{file_field: ''})).filter(
+                **{url_field: ''}
+            ).only('pk', file_field)
+
+            batch = []
+            updated = 0
+            for row in rows.iterator(chunk_size=options['batch_size']):
+                setattr(row, url_field, upload_url(field, getattr(row, file_field).name))
+                batch.append(row)
+                if len(batch) >= options['batch_size']:
+                    updated += model.objects.bulk_update(batch, [url_field])
+                    batch = []
+            if batch:
+                updated += model.objects.bulk_update(batch, [url_field])
+
+            self.stdout.write(f"{model.__name__}.{url_field}: {updated} stored")
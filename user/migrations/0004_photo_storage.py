@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+import user.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0003_fix_username_null'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='profile_pic',
+            field=models.ImageField(blank=True, null=True, storage=user.storage.photo_storage, upload_to='profile_pic/'),
+        ),
+        migrations.AlterField(
+            model_name='userphotos',
+            name='photo',
+            field=models.ImageField(blank=True, null=True, storage=user.storage.photo_storage, upload_to='photos/'),
+        ),
+    ]
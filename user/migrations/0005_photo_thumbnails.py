@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+import user.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0004_photo_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='profile_pic_thumbnail',
+            field=models.ImageField(blank=True, null=True, storage=user.storage.photo_storage, upload_to='profile_pic/thumbnails/'),
+        ),
+        migrations.AddField(
+            model_name='userphotos',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, storage=user.storage.photo_storage, upload_to='photos/thumbnails/'),
+        ),
+    ]
@@ -1,7 +1,8 @@
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractUser
 from django.db import models
-from cloudinary_storage.storage import MediaCloudinaryStorage
+
+from user.storage import photo_storage
 
 
 
@@ -64,8 +65,15 @@ class CustomUser(AbstractUser):
     is_banned = models.BooleanField(default=False)
 
     profile_pic = models.ImageField(
-        storage=MediaCloudinaryStorage(), upload_to='profile_pic/', null=True, blank=True
+        storage=photo_storage, upload_to='profile_pic/', null=True, blank=True
+    )
+    # AVATAR_THUMBNAIL_SIZE derivative of profile_pic (user/thumbnails.py), used for comment avatars
+    profile_pic_thumbnail = models.ImageField(
+        storage=photo_storage, upload_to='profile_pic/thumbnails/', null=True, blank=True
     )
+    # absolute URLs of the two files above, saved at upload (see user.storage.upload_url)
+    profile_pic_url = models.URLField(max_length=500, blank=True)
+    profile_pic_thumbnail_url = models.URLField(max_length=500, blank=True)
 
     facebook = models.URLField(null=True, blank=True)
     instagram = models.URLField(null=True, blank=True)
@@ -78,7 +86,12 @@ class CustomUser(AbstractUser):
 
 class UserPhotos(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="user_photos")
-    photo = models.ImageField(storage=MediaCloudinaryStorage(), upload_to='photos/', null=True, blank=True)
+    photo = models.ImageField(storage=photo_storage, upload_to='photos/', null=True, blank=True)
+    # PHOTO_THUMBNAIL_SIZE derivative of photo (user/thumbnails.py), used for feed cards
+    thumbnail = models.ImageField(storage=photo_storage, upload_to='photos/thumbnails/', null=True, blank=True)
+    # absolute URLs of photo and thumbnail, saved at upload (see user.storage.upload_url)
+    photo_url = models.URLField(max_length=500, blank=True)
+    thumbnail_url = models.URLField(max_length=500, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
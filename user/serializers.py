@@ -1,6 +1,7 @@
 from django.contrib.auth import authenticate
 from rest_framework import serializers
 from .models import Year, Gender, CustomUser
+from .storage import file_url
 from auction.models import Role, Faculty, Major
 
 
@@ -38,12 +39,7 @@ class CustomUserSerializer(serializers.ModelSerializer):
         read_only_fields = ["created_at", "updated_at"]
 
     def get_profile_pic(self, obj):
-        if obj.profile_pic:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.profile_pic.url)
-            return obj.profile_pic.url
-        return None
+        return file_url(obj.profile_pic_url, obj.profile_pic, self.context.get('request'))
 
     def validate_first_name(self, value):
         v = (value or "").strip()
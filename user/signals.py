@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from user.authentication import invalidate_cached_user
+from user.models import CustomUser
+
+
+@receiver(post_save, sender=CustomUser, dispatch_uid='invalidate_cached_user_on_save')
+@receiver(post_delete, sender=CustomUser, dispatch_uid='invalidate_cached_user_on_delete')
+def cached_user_changed(sender, instance, **kwargs):
+    # profile edits, bans from the admin and deletions
+    invalidate_cached_user(instance.pk)
@@ -0,0 +1,113 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.utils.deconstruct import deconstructible
+from django.utils.module_loading import import_string
+
+
+def photo_storage():
+    # PHOTO_STORAGE swaps Cloudinary out, e.g. for InMemoryPhotoStorage in local development
+    storage_class = getattr(settings, 'PHOTO_STORAGE', 'cloudinary_storage.storage.MediaCloudinaryStorage')
+    return import_string(storage_class)()
+
+
+def store_files(uploads):
+    """
+    Saves (file field, file) pairs to their fields' storage concurrently and returns the stored names, in order.
+
+    Only the storage round-trips run in the pool (PHOTO_UPLOAD_WORKERS threads); callers create
+    the rows themselves, on their own connection and transaction. If any save fails, the files
+    already stored are deleted and the error is raised.
+    """
+    def store(upload):
+        field, content = upload
+        name = field.generate_filename(None, content.name)
+        return field.storage.save(name, content, max_length=field.max_length)
+
+    workers = min(getattr(settings, 'PHOTO_UPLOAD_WORKERS', 5), len(uploads))
+    if workers <= 1:
+        names = []
+        for upload in uploads:
+            try:
+                names.append(store(upload))
+            except Exception:
+                delete_files(zip([field for field, _ in uploads], names))
+                raise
+        return names
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(store, upload) for upload in uploads]
+    # leaving the pool waited for every save, so each future is done
+    errors = [future.exception() for future in futures if future.exception()]
+    if errors:
+        delete_files(
+            (field, future.result()) for (field, _), future in zip(uploads, futures) if not future.exception()
+        )
+        raise errors[0]
+    return [future.result() for future in futures]
+
+
+def delete_files(stored):
+    """Deletes stored (file field, name) pairs: uploads whose rows couldn't be saved, or files a new upload replaced."""
+    for field, name in stored:
+        field.storage.delete(name)
+
+
+def upload_url(field, name, request=None):
+    """The URL saved next to a file at upload time, so serializers don't build it per request."""
+    url = field.storage.url(name)
+    return request.build_absolute_uri(url) if request else url
+
+
+def file_url(stored_url, file, request=None):
+    """The URL saved at upload time; rows saved before URLs were stored build it from the file."""
+    if stored_url:
+        return stored_url
+    if not file:
+        return None
+    return upload_url(file.field, file.name, request)
+
+
+@deconstructible
+class InMemoryPhotoStorage(Storage):
+    """Process-local storage for tests and local runs without Cloudinary; latency simulates the upload."""
+
+    base_url = 'https://photos.test/'
+
+    def __init__(self, latency=0):
+        self.latency = latency
+        self.files = {}
+        self._names_lock = threading.Lock()
+
+    def _save(self, name, content):
+        if self.latency:
+            time.sleep(self.latency)
+        content.seek(0)
+        self.files[name] = content.read()
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        # pick and reserve the name atomically, so parallel saves of one file name don't collide
+        with self._names_lock:
+            name = super().get_available_name(name, max_length=max_length)
+            self.files[name] = b''
+        return name
+
+    def _open(self, name, mode='rb'):
+        return ContentFile(self.files[name], name=name)
+
+    def exists(self, name):
+        return name in self.files
+
+    def delete(self, name):
+        self.files.pop(name, None)
+
+    def size(self, name):
+        return len(self.files[name])
+
+    def url(self, name):
+        return self.base_url + name
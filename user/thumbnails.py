@@ -0,0 +1,38 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+# feed cards and lot previews / comment avatars; fixed sizes, cropped to fill
+PHOTO_THUMBNAIL_SIZE = (480, 480)
+AVATAR_THUMBNAIL_SIZE = (96, 96)
+
+THUMBNAIL_FORMAT = 'WEBP' if features.check('webp') else 'JPEG'
+THUMBNAIL_EXTENSION = {'WEBP': '.webp', 'JPEG': '.jpg'}[THUMBNAIL_FORMAT]
+
+# what make_thumbnail raises for an upload that isn't a usable image: unreadable data (OSError),
+# a decompression bomb, or a malformed image header or EXIF block (ValueError)
+INVALID_IMAGE_ERRORS = (OSError, Image.DecompressionBombError, ValueError)
+
+
+def make_thumbnail(upload, size):
+    """
+    A fixed-size WebP (JPEG where Pillow lacks WebP) derivative of an uploaded image.
+
+    Raises one of INVALID_IMAGE_ERRORS if the upload isn't a usable image.
+    """
+    upload.seek(0)
+    with Image.open(upload) as image:
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha and THUMBNAIL_FORMAT == 'WEBP' else 'RGB')
+        thumbnail = ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+
+    buffer = BytesIO()
+    thumbnail.save(buffer, THUMBNAIL_FORMAT, quality=getattr(settings, 'THUMBNAIL_QUALITY', 80))
+    upload.seek(0)
+
+    stem = os.path.splitext(os.path.basename(upload.name))[0]
+    return ContentFile(buffer.getvalue(), name=f'{stem}{THUMBNAIL_EXTENSION}')